@@ -1,9 +1,10 @@
 
 import asyncio
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from src.core.logger import LoggerMixin
 from src.output.websocket_server import WebSocketOutputServer
+from src.storage.dedup_cache import LocalDedupCache, dedup_fingerprint
 from src.storage.redis_cache import RedisCache
 
 
@@ -17,7 +18,10 @@ class MessageProcessor(LoggerMixin):
         enable_state_tracking: bool = True,
         dedup_time_window: int = 30,
         dedup_ttl_multiplier: int = 2,
+        dedup_cache_size: int = 10000,
         vessel_expire_after: int = 3600,
+        batch_window_ms: int = 10,
+        batch_max_size: int = 500,
     ):
         self._logger_context = {'component': 'message-processor'}
         self.redis = redis_cache
@@ -27,13 +31,31 @@ class MessageProcessor(LoggerMixin):
         self.dedup_time_window = dedup_time_window
         self.dedup_ttl_multiplier = dedup_ttl_multiplier
         self.vessel_expire_after = vessel_expire_after
+        self.batch_window = batch_window_ms / 1000.0
+        self.batch_max_size = batch_max_size
+
+        self._pending: List[Tuple[dict, str]] = []
+        self._batch_ready = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._inflight: Optional[asyncio.Future] = None
+        self._unrecorded_duplicates = 0
+
+        self.local_dedup: Optional[LocalDedupCache] = None
+        if enable_deduplication and dedup_cache_size > 0:
+            self.local_dedup = LocalDedupCache(
+                max_size=dedup_cache_size,
+                ttl=dedup_time_window * dedup_ttl_multiplier,
+            )
 
         self.stats = {
             'total_received': 0,
             'duplicates': 0,
+            'local_duplicates': 0,
             'unique': 0,
             'broadcast_raw': 0,
             'broadcast_filtered': 0,
+            'batches': 0,
+            'max_batch_size': 0,
         }
 
     async def process_message(self, message: dict, source: str) -> None:
@@ -41,29 +63,185 @@ class MessageProcessor(LoggerMixin):
 
         await self._broadcast_raw(message, source)
 
-        if self.enable_deduplication:
-            is_dup = self.redis.is_duplicate(
+        fingerprint = self._local_fingerprint(message)
+        if self._is_local_duplicate(fingerprint):
+            return
+
+        local_duplicates = self._take_unrecorded_duplicates()
+        try:
+            is_dup, vessel_state = await self.redis.ingest(
                 message,
+                source=source,
+                deduplicate=self.enable_deduplication,
+                track_state=self.enable_state_tracking,
                 time_window=self.dedup_time_window,
                 ttl_multiplier=self.dedup_ttl_multiplier,
+                expire_after=self.vessel_expire_after,
+                local_duplicates=local_duplicates,
             )
+        except Exception:
+            self._unrecorded_duplicates += local_duplicates
+            raise
+        self._remember_local([fingerprint])
 
-            if is_dup:
-                self.stats['duplicates'] += 1
-                return
+        if is_dup:
+            self.stats['duplicates'] += 1
+            return
 
         self.stats['unique'] += 1
 
-        if self.enable_state_tracking:
-            self.redis.update_vessel(
-                message,
-                source=source,
+        enriched = self._enrich_message(message, source, vessel_state)
+
+        await self._broadcast_filtered(enriched)
+
+    def submit(self, message: dict, source: str) -> None:
+        self._pending.append((message, source))
+        self._batch_ready.set()
+
+        if len(self._pending) >= self.batch_max_size:
+            self._batch_full.set()
+
+    async def batch_loop(self) -> None:
+        while True:
+            await self._batch_ready.wait()
+
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=self.batch_window)
+            except asyncio.TimeoutError:
+                pass
+
+            batch = self._take_batch()
+
+            self._inflight = asyncio.ensure_future(self.process_batch(batch))
+            try:
+                await asyncio.shield(self._inflight)
+            except Exception as e:
+                self.logger.error("Batch processing error", error=str(e), size=len(batch))
+
+    def _take_batch(self) -> List[Tuple[dict, str]]:
+        batch = self._pending[:self.batch_max_size]
+        del self._pending[:self.batch_max_size]
+
+        if not self._pending:
+            self._batch_ready.clear()
+        if len(self._pending) < self.batch_max_size:
+            self._batch_full.clear()
+
+        return batch
+
+    async def flush(self) -> None:
+        if self._inflight is not None and not self._inflight.done():
+            try:
+                await self._inflight
+            except Exception as e:
+                self.logger.error("Batch processing error", error=str(e))
+
+        while self._pending:
+            batch = self._take_batch()
+            try:
+                await self.process_batch(batch)
+            except Exception as e:
+                self.logger.error("Batch processing error", error=str(e), size=len(batch))
+
+        await self.record_duplicates()
+
+    async def record_duplicates(self) -> None:
+        count = self._take_unrecorded_duplicates()
+        if not count:
+            return
+
+        try:
+            await self.redis.record_duplicates(count)
+        except Exception:
+            self._unrecorded_duplicates += count
+            raise
+
+    async def process_batch(self, batch: List[Tuple[dict, str]]) -> None:
+        if not batch:
+            return
+
+        self.stats['total_received'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+
+        for message, source in batch:
+            await self._broadcast_raw(message, source)
+
+        pending = []
+        fingerprints = []
+        in_batch = set()
+        for message, source in batch:
+            fingerprint = self._batch_fingerprint(message)
+            if fingerprint in in_batch:
+                self._count_local_duplicate()
+                continue
+            if self._is_local_duplicate(fingerprint):
+                continue
+            if fingerprint is not None:
+                in_batch.add(fingerprint)
+            pending.append((message, source))
+            fingerprints.append(fingerprint)
+
+        if not pending:
+            return
+
+        local_duplicates = self._take_unrecorded_duplicates()
+        try:
+            results = await self.redis.ingest_batch(
+                pending,
+                deduplicate=self.enable_deduplication,
+                track_state=self.enable_state_tracking,
+                time_window=self.dedup_time_window,
+                ttl_multiplier=self.dedup_ttl_multiplier,
                 expire_after=self.vessel_expire_after,
+                local_duplicates=local_duplicates,
             )
+        except Exception:
+            self._unrecorded_duplicates += local_duplicates
+            raise
+        self._remember_local(fingerprints)
+
+        for (message, source), (is_dup, vessel_state) in zip(pending, results):
+            if is_dup:
+                self.stats['duplicates'] += 1
+                continue
 
-        enriched = await self._enrich_message(message, source)
+            self.stats['unique'] += 1
+            await self._broadcast_filtered(self._enrich_message(message, source, vessel_state))
 
-        await self._broadcast_filtered(enriched)
+    def _local_fingerprint(self, message: dict) -> Optional[str]:
+        if self.local_dedup is None:
+            return None
+        return dedup_fingerprint(message, self.dedup_time_window)
+
+    def _batch_fingerprint(self, message: dict) -> Optional[str]:
+        if not self.enable_deduplication:
+            return None
+        return dedup_fingerprint(message, self.dedup_time_window)
+
+    def _is_local_duplicate(self, fingerprint: Optional[str]) -> bool:
+        if fingerprint is None or self.local_dedup is None or not self.local_dedup.seen(fingerprint):
+            return False
+
+        self._count_local_duplicate()
+        return True
+
+    def _count_local_duplicate(self) -> None:
+        self.stats['duplicates'] += 1
+        self.stats['local_duplicates'] += 1
+        self._unrecorded_duplicates += 1
+
+    def _take_unrecorded_duplicates(self) -> int:
+        count, self._unrecorded_duplicates = self._unrecorded_duplicates, 0
+        return count
+
+    def _remember_local(self, fingerprints: List[Optional[str]]) -> None:
+        if self.local_dedup is None:
+            return
+
+        for fingerprint in fingerprints:
+            if fingerprint is not None:
+                self.local_dedup.add(fingerprint)
 
     async def _broadcast_raw(self, message: dict, source: str) -> None:
         raw_message = {
@@ -75,14 +253,7 @@ class MessageProcessor(LoggerMixin):
         await self.output.broadcast_raw(raw_message)
         self.stats['broadcast_raw'] += 1
 
-    async def _enrich_message(self, message: dict, source: str) -> dict:
-        mmsi = message.get('mmsi')
-
-        if not mmsi:
-            return message
-
-        vessel_state = self.redis.get_vessel(mmsi)
-
+    def _enrich_message(self, message: dict, source: str, vessel_state: Optional[dict]) -> dict:
         if not vessel_state:
             return message
 
@@ -106,6 +277,8 @@ class MessageProcessor(LoggerMixin):
                 if self.stats['total_received'] > 0
                 else 0
             ),
+            'pending': len(self._pending),
+            'local_dedup': self.local_dedup.get_stats() if self.local_dedup is not None else None,
         }
 
     async def cleanup_task(self, interval: int = 300) -> None:
@@ -113,7 +286,8 @@ class MessageProcessor(LoggerMixin):
             await asyncio.sleep(interval)
 
             try:
-                cleaned = self.redis.cleanup_expired_vessels()
+                await self.record_duplicates()
+                cleaned = await self.redis.cleanup_expired_vessels(self.vessel_expire_after)
                 if cleaned > 0:
                     self.logger.info("Cleanup completed", vessels_removed=cleaned)
             except Exception as e:
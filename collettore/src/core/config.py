@@ -38,11 +38,20 @@ class StateTrackingConfig(BaseModel):
     max_history_points: int = 100
 
 
+class BatchingConfig(BaseModel):
+    
+
+    enabled: bool = True
+    window_ms: int = 10
+    max_size: int = 500
+
+
 class AggregationConfig(BaseModel):
     
 
     deduplication: DeduplicationConfig = DeduplicationConfig()
     state_tracking: StateTrackingConfig = StateTrackingConfig()
+    batching: BatchingConfig = BatchingConfig()
 
 
 class WebSocketOutputConfig(BaseModel):
@@ -3,9 +3,10 @@ import asyncio
 import os
 import signal
 from pathlib import Path
+from typing import Optional
 
 import uvicorn
-from fastapi import FastAPI, Request, WebSocket, WebSocketException, status
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
@@ -44,6 +45,7 @@ class CollettoreServer:
         self.redis_cache: RedisCache = None
         self.output_server: WebSocketOutputServer = None
         self.message_processor: MessageProcessor = None
+        self._batch_task: asyncio.Task = None
 
         self.app = FastAPI(title="DarkFleet Collettore", version="1.0.0")
 
@@ -69,6 +71,7 @@ class CollettoreServer:
             password=self.config.redis.password,
             max_connections=self.config.redis.max_connections,
         )
+        await self.redis_cache.connect()
 
         self.output_server = WebSocketOutputServer(
             max_clients=self.config.output.max_clients,
@@ -81,7 +84,10 @@ class CollettoreServer:
             enable_state_tracking=self.config.aggregation.state_tracking.enabled,
             dedup_time_window=self.config.aggregation.deduplication.time_window,
             dedup_ttl_multiplier=self.config.aggregation.deduplication.ttl_multiplier,
+            dedup_cache_size=self.config.aggregation.deduplication.cache_size,
             vessel_expire_after=self.config.aggregation.state_tracking.expire_after,
+            batch_window_ms=self.config.aggregation.batching.window_ms,
+            batch_max_size=self.config.aggregation.batching.max_size,
         )
 
         sources_config = [source.dict() for source in self.config.sources]
@@ -92,12 +98,18 @@ class CollettoreServer:
         logger.info("All components initialized")
 
     def _on_source_message(self, message: dict, source: str) -> None:
-        asyncio.create_task(self.message_processor.process_message(message, source))
+        if self.config.aggregation.batching.enabled:
+            self.message_processor.submit(message, source)
+        else:
+            asyncio.create_task(self.message_processor.process_message(message, source))
 
     async def start(self) -> None:
         
         logger.info("Starting Collettore server")
 
+        if self.config.aggregation.batching.enabled:
+            self._batch_task = asyncio.create_task(self.message_processor.batch_loop())
+
         await self.source_manager.start_all()
 
         if self.config.aggregation.state_tracking.enabled:
@@ -118,7 +130,7 @@ class CollettoreServer:
             source_stats = self.source_manager.get_stats()
             processor_stats = self.message_processor.get_stats()
             output_stats = self.output_server.get_stats()
-            redis_stats = self.redis_cache.get_stats()
+            redis_stats = await self.redis_cache.get_stats()
 
             logger.info(
                 "Collettore statistics",
@@ -136,6 +148,20 @@ class CollettoreServer:
         if self.source_manager:
             await self.source_manager.stop_all()
 
+        if self._batch_task:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+
+        if self.message_processor:
+            await self.message_processor.flush()
+
+        if self.redis_cache:
+            await self.redis_cache.close()
+
         logger.info("Collettore server stopped")
 
 
@@ -260,7 +286,7 @@ async def get_stats():
         "sources": collettore_server.source_manager.get_stats(),
         "processor": collettore_server.message_processor.get_stats(),
         "output": collettore_server.output_server.get_stats(),
-        "redis": collettore_server.redis_cache.get_stats(),
+        "redis": await collettore_server.redis_cache.get_stats(),
     }
 
 
@@ -276,16 +302,30 @@ async def get_sources():
 
 
 @app.get("/api/vessels")
-async def get_vessels():
+async def get_vessels(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    active_within: Optional[int] = Query(None, ge=1),
+):
     
     if not collettore_server:
         return {"error": "Server not initialized"}
 
-    active_vessels = collettore_server.redis_cache.get_active_vessels()
+    redis_cache = collettore_server.redis_cache
+
+    try:
+        vessels, next_cursor = await redis_cache.get_active_vessels(
+            limit=limit,
+            cursor=cursor,
+            active_within=active_within,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
     return {
-        "count": len(active_vessels),
-        "vessels": list(active_vessels)[:100],
+        "count": await redis_cache.count_active_vessels(active_within=active_within),
+        "vessels": vessels,
+        "next_cursor": next_cursor,
     }
 
 
@@ -295,7 +335,7 @@ async def get_vessel(mmsi: str):
     if not collettore_server:
         return {"error": "Server not initialized"}
 
-    vessel = collettore_server.redis_cache.get_vessel(mmsi)
+    vessel = await collettore_server.redis_cache.get_vessel(mmsi)
 
     if not vessel:
         return {"error": "Vessel not found"}
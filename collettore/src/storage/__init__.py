@@ -1,5 +1,6 @@
 
 
+from src.storage.dedup_cache import LocalDedupCache, dedup_fingerprint
 from src.storage.redis_cache import RedisCache
 
-__all__ = ["RedisCache"]
+__all__ = ["LocalDedupCache", "RedisCache", "dedup_fingerprint"]
@@ -0,0 +1,80 @@
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+
+def dedup_fingerprint(message: dict, time_window: int = 30) -> str:
+    ts = message.get('timestamp', time.time())
+
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace('Z', '+00:00')).timestamp()
+
+    ts_rounded = int(ts // time_window) * time_window
+
+    mmsi = message.get('mmsi', '')
+    lat = message.get('lat', 0)
+    lon = message.get('lon', 0)
+
+    return f"{mmsi}-{ts_rounded}-{lat:.4f}-{lon:.4f}"
+
+
+class LocalDedupCache:
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evicted': 0,
+        }
+
+    def _expire(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            if next(iter(entries.values())) > now:
+                break
+            entries.popitem(last=False)
+            self.stats['expired'] += 1
+
+    def seen(self, fingerprint: str, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+
+        self._expire(now)
+
+        if fingerprint in self._entries:
+            self.stats['hits'] += 1
+            return True
+
+        self.stats['misses'] += 1
+        return False
+
+    def add(self, fingerprint: str, now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.monotonic()
+
+        self._entries.pop(fingerprint, None)
+        self._entries[fingerprint] = now + self.ttl
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hit_rate': self.stats['hits'] / lookups if lookups > 0 else 0,
+        }
@@ -1,11 +1,71 @@
 
 import hashlib
-import json
-from typing import Dict, Optional, Set
+import time
+from typing import Dict, List, Optional, Tuple
 
-import redis
+import redis.asyncio as redis
 
 from src.core.logger import LoggerMixin
+from src.storage.dedup_cache import dedup_fingerprint
+
+
+STATE_FIELDS = ('lat', 'lon', 'speed', 'course', 'heading')
+STATIC_FIELDS = ('name', 'imo', 'callsign', 'shiptype')
+
+ACTIVE_VESSELS_KEY = 'vessels:active'
+LEGACY_ACTIVE_VESSELS_KEY = 'active_vessels'
+
+# KEYS: dedup, vessel hash, vessel sources, stats:unique, stats:duplicates, active_vessels
+# ARGV: deduplicate, dedup ttl, track_state, expire_after, source, mmsi, now, field/value pairs...
+INGEST_SCRIPT = """
+if ARGV[1] == '1' then
+    if not redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[2]) then
+        redis.call('INCR', KEYS[5])
+        return {1}
+    end
+    redis.call('INCR', KEYS[4])
+end
+
+if ARGV[6] == '' then
+    return {0}
+end
+
+if ARGV[3] == '1' then
+    if #ARGV > 7 then
+        redis.call('HSET', KEYS[2], unpack(ARGV, 8))
+    end
+    redis.call('HINCRBY', KEYS[2], 'message_count', 1)
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+    if ARGV[5] ~= '' then
+        redis.call('SADD', KEYS[3], ARGV[5])
+        redis.call('EXPIRE', KEYS[3], ARGV[4])
+    end
+    redis.call('ZADD', KEYS[6], ARGV[7], ARGV[6])
+end
+
+return {0, redis.call('HGETALL', KEYS[2]), redis.call('SMEMBERS', KEYS[3])}
+"""
+
+
+class LatencyStats:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0,
+            'max_ms': round(self.max * 1000, 3),
+        }
 
 
 class RedisCache(LoggerMixin):
@@ -19,6 +79,9 @@ class RedisCache(LoggerMixin):
         max_connections: int = 50,
     ):
         self._logger_context = {'component': 'redis-cache'}
+        self.host = host
+        self.port = port
+        self.db = db
 
         pool = redis.ConnectionPool(
             host=host,
@@ -30,129 +93,232 @@ class RedisCache(LoggerMixin):
         )
 
         self.redis = redis.Redis(connection_pool=pool)
+        self._ingest_script = self.redis.register_script(INGEST_SCRIPT)
+
+        self.latency: Dict[str, LatencyStats] = {
+            'ingest': LatencyStats(),
+            'ingest_batch': LatencyStats(),
+        }
 
+    async def connect(self) -> None:
         try:
-            self.redis.ping()
-            self.logger.info("Redis connected", host=host, port=port, db=db)
+            await self.redis.ping()
+            self.logger.info("Redis connected", host=self.host, port=self.port, db=self.db)
+
+            if await self.redis.delete(LEGACY_ACTIVE_VESSELS_KEY):
+                self.logger.info("Removed legacy active vessels set", key=LEGACY_ACTIVE_VESSELS_KEY)
         except Exception as e:
             self.logger.error("Redis connection failed", error=str(e))
             raise
 
+    async def close(self) -> None:
+        await self.redis.aclose()
 
-    def is_duplicate(
-        self,
-        message: dict,
-        time_window: int = 30,
-        ttl_multiplier: int = 2,
-    ) -> bool:
-        import time
-        ts = message.get('timestamp', time.time())
 
-        if isinstance(ts, str):
-            from datetime import datetime
-            ts = datetime.fromisoformat(ts.replace('Z', '+00:00')).timestamp()
+    @staticmethod
+    def _dedup_key(message: dict, time_window: int) -> str:
+        msg_str = dedup_fingerprint(message, time_window)
+        msg_hash = hashlib.md5(msg_str.encode()).hexdigest()
 
-        ts_rounded = int(ts // time_window) * time_window
+        return f"dedup:{msg_hash}"
 
-        mmsi = message.get('mmsi', '')
-        lat = message.get('lat', 0)
-        lon = message.get('lon', 0)
+    @staticmethod
+    def _vessel_updates(message: dict) -> dict:
+        updates = {}
 
-        msg_str = f"{mmsi}-{ts_rounded}-{lat:.4f}-{lon:.4f}"
-        msg_hash = hashlib.md5(msg_str.encode()).hexdigest()
+        for field in STATE_FIELDS:
+            if field in message:
+                updates[field] = str(message[field])
 
-        key = f"dedup:{msg_hash}"
+        for field in STATIC_FIELDS:
+            if message.get(field):
+                updates[field] = str(message[field])
 
-        if self.redis.exists(key):
-            self.redis.incr("stats:duplicates")
-            return True
+        updates['mmsi'] = str(message['mmsi'])
+        updates['last_update'] = message.get('timestamp', '')
+        return updates
 
-        ttl = time_window * ttl_multiplier
-        self.redis.setex(key, ttl, '1')
+    async def record_duplicates(self, count: int) -> None:
+        if count:
+            await self.redis.incrby('stats:duplicates', count)
 
-        self.redis.incr("stats:unique")
-        return False
+    async def get_dedup_stats(self) -> dict:
 
-    def get_dedup_stats(self) -> dict:
-        
+        unique, duplicates = await self.redis.mget('stats:unique', 'stats:duplicates')
         return {
-            'unique': int(self.redis.get('stats:unique') or 0),
-            'duplicates': int(self.redis.get('stats:duplicates') or 0),
+            'unique': int(unique or 0),
+            'duplicates': int(duplicates or 0),
         }
 
 
-    def update_vessel(self, message: dict, source: str, expire_after: int = 3600) -> None:
-        mmsi = message.get('mmsi')
-        if not mmsi:
-            return
-
-        key = f"vessel:{mmsi}"
-
-        current = self.redis.hgetall(key)
-
-        updates = {}
-
-        if 'lat' in message:
-            updates['lat'] = str(message['lat'])
-        if 'lon' in message:
-            updates['lon'] = str(message['lon'])
-        if 'speed' in message:
-            updates['speed'] = str(message['speed'])
-        if 'course' in message:
-            updates['course'] = str(message['course'])
-        if 'heading' in message:
-            updates['heading'] = str(message['heading'])
-
-        for field in ['name', 'imo', 'callsign', 'shiptype']:
-            if field in message and message[field]:
-                updates[field] = str(message[field])
-            elif field in current:
-                updates[field] = current[field]
-
-        updates['mmsi'] = str(mmsi)
-        updates['last_update'] = message.get('timestamp', '')
-
-        if source:
-            sources_key = f"vessel:{mmsi}:sources"
-            self.redis.sadd(sources_key, source)
-            self.redis.expire(sources_key, expire_after)
-
-        count_key = f"vessel:{mmsi}:count"
-        self.redis.incr(count_key)
-        self.redis.expire(count_key, expire_after)
-        updates['message_count'] = str(self.redis.get(count_key))
+    def _ingest_call(
+        self,
+        message: dict,
+        source: str,
+        deduplicate: bool,
+        track_state: bool,
+        time_window: int,
+        ttl_multiplier: int,
+        expire_after: int,
+    ) -> Tuple[List[str], list]:
+        mmsi = message.get('mmsi') or ''
+        dedup_key = self._dedup_key(message, time_window) if deduplicate else ''
+
+        args = [
+            '1' if deduplicate else '0',
+            time_window * ttl_multiplier,
+            '1' if track_state else '0',
+            expire_after,
+            source or '',
+            mmsi,
+            time.time(),
+        ]
+        if mmsi and track_state:
+            for field, value in self._vessel_updates(message).items():
+                args.extend((field, value))
+
+        keys = [
+            dedup_key,
+            f"vessel:{mmsi}",
+            f"vessel:{mmsi}:sources",
+            'stats:unique',
+            'stats:duplicates',
+            ACTIVE_VESSELS_KEY,
+        ]
+        return keys, args
+
+    @staticmethod
+    def _parse_ingest_result(result: list) -> Tuple[bool, Optional[dict]]:
+        if int(result[0]) == 1:
+            return True, None
+
+        if len(result) < 3 or not result[1]:
+            return False, None
+
+        flat = result[1]
+        data = dict(zip(flat[::2], flat[1::2]))
+        data['sources'] = list(result[2])
+        return False, data
+
+    async def ingest(
+        self,
+        message: dict,
+        source: str,
+        deduplicate: bool = True,
+        track_state: bool = True,
+        time_window: int = 30,
+        ttl_multiplier: int = 2,
+        expire_after: int = 3600,
+        local_duplicates: int = 0,
+    ) -> Tuple[bool, Optional[dict]]:
+        keys, args = self._ingest_call(
+            message, source, deduplicate, track_state,
+            time_window, ttl_multiplier, expire_after,
+        )
 
-        if updates:
-            self.redis.hset(key, mapping=updates)
-            self.redis.expire(key, expire_after)
+        start = time.perf_counter()
+        if local_duplicates:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                await self._ingest_script(keys=keys, args=args, client=pipe)
+                pipe.incrby('stats:duplicates', local_duplicates)
+                result, _ = await pipe.execute()
+        else:
+            result = await self._ingest_script(keys=keys, args=args)
 
-        self.redis.sadd('active_vessels', mmsi)
+        self.latency['ingest'].record(time.perf_counter() - start)
+        return self._parse_ingest_result(result)
 
-    def get_vessel(self, mmsi: str) -> Optional[dict]:
-        key = f"vessel:{mmsi}"
-        data = self.redis.hgetall(key)
+    async def ingest_batch(
+        self,
+        items: List[Tuple[dict, str]],
+        deduplicate: bool = True,
+        track_state: bool = True,
+        time_window: int = 30,
+        ttl_multiplier: int = 2,
+        expire_after: int = 3600,
+        local_duplicates: int = 0,
+    ) -> List[Tuple[bool, Optional[dict]]]:
+        if not items:
+            return []
+
+        start = time.perf_counter()
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for message, source in items:
+                keys, args = self._ingest_call(
+                    message, source, deduplicate, track_state,
+                    time_window, ttl_multiplier, expire_after,
+                )
+                await self._ingest_script(keys=keys, args=args, client=pipe)
+            if local_duplicates:
+                pipe.incrby('stats:duplicates', local_duplicates)
+            results = await pipe.execute()
+
+        if local_duplicates:
+            results = results[:-1]
+
+        self.latency['ingest_batch'].record(time.perf_counter() - start)
+        return [self._parse_ingest_result(result) for result in results]
+
+    async def get_vessel(self, mmsi: str) -> Optional[dict]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(f"vessel:{mmsi}")
+            pipe.smembers(f"vessel:{mmsi}:sources")
+            data, sources = await pipe.execute()
 
         if not data:
             return None
 
-        sources_key = f"vessel:{mmsi}:sources"
-        sources = self.redis.smembers(sources_key)
-
         data['sources'] = list(sources)
         return data
 
-    def get_active_vessels(self) -> Set[str]:
-        return self.redis.smembers('active_vessels')
+    async def get_active_vessels(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        active_within: Optional[int] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        max_score: object = '+inf'
+        skip = 0
+        if cursor:
+            score, skip = cursor.split(':')
+            max_score, skip = float(score), int(skip)
+
+        min_score: object = time.time() - active_within if active_within else '-inf'
+
+        entries = await self.redis.zrevrangebyscore(
+            ACTIVE_VESSELS_KEY,
+            max_score,
+            min_score,
+            start=skip,
+            num=limit + 1,
+            withscores=True,
+        )
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        next_cursor = None
+        if has_more and entries:
+            last_score = entries[-1][1]
+            ties = sum(1 for _, score in entries if score == last_score)
+            if last_score == max_score:
+                ties += skip
+            next_cursor = f"{last_score!r}:{ties}"
 
-    def cleanup_expired_vessels(self) -> int:
-        active = self.redis.smembers('active_vessels')
-        cleaned = 0
+        vessels = [{'mmsi': mmsi, 'last_seen': score} for mmsi, score in entries]
+        return vessels, next_cursor
 
-        for mmsi in active:
-            key = f"vessel:{mmsi}"
-            if not self.redis.exists(key):
-                self.redis.srem('active_vessels', mmsi)
-                cleaned += 1
+    async def count_active_vessels(self, active_within: Optional[int] = None) -> int:
+        if not active_within:
+            return await self.redis.zcard(ACTIVE_VESSELS_KEY)
+
+        return await self.redis.zcount(ACTIVE_VESSELS_KEY, time.time() - active_within, '+inf')
+
+    async def cleanup_expired_vessels(self, expire_after: int = 3600) -> int:
+        cleaned = await self.redis.zremrangebyscore(
+            ACTIVE_VESSELS_KEY, '-inf', time.time() - expire_after,
+        )
 
         if cleaned > 0:
             self.logger.info("Cleaned up expired vessels", count=cleaned)
@@ -160,14 +326,15 @@ class RedisCache(LoggerMixin):
         return cleaned
 
 
-    def get_stats(self) -> dict:
-        
+    async def get_stats(self) -> dict:
+
         return {
-            'active_vessels': self.redis.scard('active_vessels'),
-            'deduplication': self.get_dedup_stats(),
+            'active_vessels': await self.redis.zcard(ACTIVE_VESSELS_KEY),
+            'deduplication': await self.get_dedup_stats(),
+            'latency': {name: stats.to_dict() for name, stats in self.latency.items()},
         }
 
-    def clear_all(self) -> None:
-        
-        self.redis.flushdb()
+    async def clear_all(self) -> None:
+
+        await self.redis.flushdb()
         self.logger.warning("Redis cache cleared")
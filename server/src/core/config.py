@@ -35,12 +35,23 @@ class WatchlistAPIConfig(BaseModel):
     retry_delay: int = Field(1000, description="Delay between retries (ms)")
 
 
+class WatchlistPushConfig(BaseModel):
+    
+    flush_interval: int = Field(5000, description="Flush interval for coalesced vessel updates (ms)")
+    max_concurrency: int = Field(4, ge=1, description="Max concurrent update requests")
+    batch_size: int = Field(500, ge=1, description="Max updates per bulk request")
+    max_pending: int = Field(10000, ge=1, description="Max distinct IMOs buffered between flushes")
+    max_retries: int = Field(3, ge=0, description="Flushes a failed update is retried in before it is dropped")
+    use_bulk: bool = Field(True, description="Use the bulk update-by-imo endpoint")
+
+
 class WatchlistConfig(BaseModel):
     
     enabled: bool = Field(True)
     api: WatchlistAPIConfig
     sync_mode: str = Field("manual", description="manual or scheduled")
     sync_interval: int = Field(3600000, description="Sync interval (ms)")
+    push: WatchlistPushConfig = Field(default_factory=WatchlistPushConfig)
 
 
 class WebSocketSSLConfig(BaseModel):
@@ -197,7 +208,15 @@ class ConfigManager:
                     retry_delay=int(os.getenv('WATCHLIST_API_RETRY_DELAY', '1000'))
                 ),
                 sync_mode=os.getenv('WATCHLIST_SYNC_MODE', 'manual'),
-                sync_interval=int(os.getenv('WATCHLIST_SYNC_INTERVAL', '3600000'))
+                sync_interval=int(os.getenv('WATCHLIST_SYNC_INTERVAL', '3600000')),
+                push=WatchlistPushConfig(
+                    flush_interval=int(os.getenv('WATCHLIST_PUSH_FLUSH_INTERVAL', '5000')),
+                    max_concurrency=int(os.getenv('WATCHLIST_PUSH_MAX_CONCURRENCY', '4')),
+                    batch_size=int(os.getenv('WATCHLIST_PUSH_BATCH_SIZE', '500')),
+                    max_pending=int(os.getenv('WATCHLIST_PUSH_MAX_PENDING', '10000')),
+                    max_retries=int(os.getenv('WATCHLIST_PUSH_MAX_RETRIES', '3')),
+                    use_bulk=os.getenv('WATCHLIST_PUSH_USE_BULK', 'true').lower() == 'true'
+                )
             ),
             websocket=WebSocketConfig(
                 host=os.getenv('WEBSOCKET_HOST', '0.0.0.0'),
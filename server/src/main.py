@@ -19,7 +19,7 @@ from src.core.keycloak_auth import get_client_ip
 from src.modules.ais_parser import NMEAParser
 from src.modules.database import DatabaseManager
 from src.modules.stream_ingestion import SatelliteClient
-from src.modules.watchlist import WatchlistAPIClient, WatchlistManager
+from src.modules.watchlist import VesselUpdateQueue, WatchlistAPIClient, WatchlistManager
 from src.modules.websocket import WebSocketServer
 from src.modules.admin.token_manager import TokenManager
 from src.modules.admin.audit_logger import AuditLogger
@@ -40,6 +40,7 @@ class DarkFleetServer:
         self.satellite_client: SatelliteClient = None
         self.watchlist_api_client: WatchlistAPIClient = None
         self.watchlist_manager: WatchlistManager = None
+        self.watchlist_update_queue: VesselUpdateQueue = None
         self.websocket_server: WebSocketServer = None
         self.token_manager: TokenManager = None
         self.audit_logger: AuditLogger = None
@@ -95,11 +96,23 @@ class DarkFleetServer:
                 retry_delay=self.config.watchlist.api.retry_delay,
             )
 
+            push_config = self.config.watchlist.push
+            self.watchlist_update_queue = VesselUpdateQueue(
+                api_client=self.watchlist_api_client,
+                flush_interval=push_config.flush_interval,
+                max_concurrency=push_config.max_concurrency,
+                batch_size=push_config.batch_size,
+                max_pending=push_config.max_pending,
+                max_retries=push_config.max_retries,
+                use_bulk=push_config.use_bulk,
+            )
+
             self.watchlist_manager = WatchlistManager(
                 api_client=self.watchlist_api_client,
                 db_manager=self.db_manager,
                 sync_mode=self.config.watchlist.sync_mode,
                 sync_interval=self.config.watchlist.sync_interval,
+                update_queue=self.watchlist_update_queue,
             )
 
             await self.watchlist_manager.load_from_database()
@@ -112,6 +125,8 @@ class DarkFleetServer:
             if self.config.watchlist.sync_mode == "scheduled":
                 await self.watchlist_manager.start_scheduled_sync()
 
+            await self.watchlist_update_queue.start()
+
         self.websocket_server = WebSocketServer(
             max_clients=self.config.websocket.max_clients,
             max_clients_geo=self.config.websocket.max_clients_geo,
@@ -216,6 +231,9 @@ class DarkFleetServer:
         if self.watchlist_manager:
             await self.watchlist_manager.stop_scheduled_sync()
 
+        if self.watchlist_update_queue:
+            await self.watchlist_update_queue.stop()
+
         if self.watchlist_api_client:
             await self.watchlist_api_client.close()
 
@@ -415,7 +433,7 @@ async def reconnect_satellite(request: Request, _: str = Depends(verify_token)):
 
 @app.post("/api/watchlist/sync")
 @limiter.limit("10/minute")
-async def sync_watchlist(request: Request, _: str = Depends(verify_token)):
+async def sync_watchlist(request: Request, force: bool = False, _: str = Depends(verify_token)):
     
     if not darkfleet_server:
         return {"error": "Server not initialized", "success": False}
@@ -424,7 +442,7 @@ async def sync_watchlist(request: Request, _: str = Depends(verify_token)):
         return {"error": "Watchlist manager not enabled", "success": False}
 
     try:
-        result = await darkfleet_server.watchlist_manager.sync_from_api()
+        result = await darkfleet_server.watchlist_manager.sync_from_api(force=force)
         return {
             "success": True,
             "message": "Watchlist synced successfully",
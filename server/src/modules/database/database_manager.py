@@ -215,6 +215,39 @@ class DatabaseManager(LoggerMixin):
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
 
+    async def delete_vessels(self, vessels: List[Dict]) -> int:
+        if not vessels:
+            return 0
+
+        query = """
+            DELETE FROM vessels
+            WHERE mmsi IS ? AND imo IS ? AND list_id IS ?
+        """
+
+        values = [
+            (item.get('mmsi'), item.get('imo'), item.get('list_id'))
+            for item in vessels
+        ]
+
+        await self.db.executemany(query, values)
+        await self.db.commit()
+
+        self.logger.debug("Vessels deleted", count=len(vessels))
+        return len(vessels)
+
+    async def delete_lists(self, list_ids: List[str]) -> int:
+        if not list_ids:
+            return 0
+
+        await self.db.executemany(
+            "DELETE FROM lists WHERE list_id = ?",
+            [(list_id,) for list_id in list_ids],
+        )
+        await self.db.commit()
+
+        self.logger.debug("Lists deleted", count=len(list_ids))
+        return len(list_ids)
+
     async def get_vessel_by_mmsi(self, mmsi: str) -> Optional[Dict]:
         
         async with self.db.execute(
@@ -1,5 +1,7 @@
 
 from .api_client import WatchlistAPIClient
+from .snapshot import WatchlistSnapshot
+from .update_queue import VesselUpdateQueue
 from .watchlist_manager import WatchlistManager
 
-__all__ = ['WatchlistAPIClient', 'WatchlistManager']
+__all__ = ['VesselUpdateQueue', 'WatchlistAPIClient', 'WatchlistManager', 'WatchlistSnapshot']
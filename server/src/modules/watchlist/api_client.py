@@ -1,6 +1,8 @@
 
 import asyncio
-from typing import Dict, List, Optional, Tuple
+import codecs
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import aiohttp
 from tenacity import (
@@ -13,6 +15,129 @@ from tenacity import (
 from src.core.logger import LoggerMixin
 
 
+_WHITESPACE = ' \t\n\r'
+
+
+def _complete(buffer: str, end: int) -> bool:
+    # A value cut at a chunk boundary (e.g. "3." of 3.5) can still decode, so
+    # only trust it once the following delimiter has arrived.
+    return end < len(buffer) and buffer[end] in _WHITESPACE + ',]}'
+
+
+async def iter_json_array(
+    content: aiohttp.StreamReader,
+    chunk_size: int = 65536,
+    envelope: Optional[Dict] = None,
+) -> AsyncIterator:
+    # Accepts either a bare array or a page object such as
+    # {"items": [...], "next_cursor": ...}. Items are streamed either way; the
+    # other members of a page object are decoded into ``envelope``.
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    state = 'start'
+    in_object = False
+    key = None
+    eof = False
+    chunks = content.iter_chunked(chunk_size)
+
+    while state != 'done':
+        try:
+            chunk = await chunks.__anext__()
+            buffer += text_decoder.decode(chunk)
+        except StopAsyncIteration:
+            buffer += text_decoder.decode(b'', final=True)
+            eof = True
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer) or state == 'done':
+                break
+
+            if state == 'start':
+                if buffer[pos] == '[':
+                    state = 'items'
+                elif buffer[pos] == '{' and envelope is not None:
+                    state = 'key'
+                    in_object = True
+                else:
+                    raise ValueError(f"Expected list response, got {buffer[pos]!r}")
+                pos += 1
+                continue
+
+            if state == 'key':
+                if buffer[pos] == ',':
+                    pos += 1
+                    continue
+                if buffer[pos] == '}':
+                    state = 'done'
+                    break
+                try:
+                    name, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    break
+                while end < len(buffer) and buffer[end] in _WHITESPACE:
+                    end += 1
+                if end >= len(buffer):
+                    if eof:
+                        raise ValueError("Truncated JSON object in response")
+                    break
+                if buffer[end] != ':':
+                    raise ValueError(f"Expected ':' after {name!r}")
+                key = name
+                state = 'value'
+                pos = end + 1
+                continue
+
+            if state == 'value':
+                if key == 'items' and buffer[pos] == '[':
+                    state = 'items'
+                    pos += 1
+                    continue
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    break
+                if not eof and not _complete(buffer, end):
+                    break
+                envelope[key] = value
+                state = 'key'
+                pos = end
+                continue
+
+            if buffer[pos] == ',':
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                state = 'key' if in_object else 'done'
+                pos += 1
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break
+
+            if not eof and not _complete(buffer, end):
+                break
+
+            yield item
+            pos = end
+
+        buffer = buffer[pos:]
+
+        if eof and state != 'done':
+            raise ValueError("Truncated JSON array in response")
+
+
 class WatchlistAPIClient(LoggerMixin):
 
     def __init__(
@@ -38,6 +163,9 @@ class WatchlistAPIClient(LoggerMixin):
 
         self.session: Optional[aiohttp.ClientSession] = None
 
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self._staged_validators: Dict[str, Dict[str, str]] = {}
+
     def _get_headers(self) -> Dict[str, str]:
         
         headers = {
@@ -67,67 +195,211 @@ class WatchlistAPIClient(LoggerMixin):
         if self.session and not self.session.closed:
             await self.session.close()
 
+    def reset_validators(self) -> None:
+        
+        self._validators.clear()
+        self._staged_validators.clear()
+
+    def commit_validators(self) -> None:
+        
+        self._validators.update(self._staged_validators)
+        self._staged_validators.clear()
+
+    def _stage_validators(self, endpoint: str, response: aiohttp.ClientResponse) -> None:
+        self._staged_validators[endpoint] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+
+    def _conditional_headers(self, endpoint: str) -> Dict[str, str]:
+        validators = self._validators.get(endpoint, {})
+        headers = {}
+
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        return headers
+
+    @staticmethod
+    def _page_params(cursor: Optional[str]) -> Dict[str, str]:
+        params = {'paginate': 'true'}
+        if cursor:
+            params['cursor'] = cursor
+        return params
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
         reraise=True,
     )
-    async def _fetch_endpoint(self, endpoint: str) -> List[Dict]:
-        await self._ensure_session()
-
+    async def _fetch_page(
+        self,
+        endpoint: str,
+        conditional: bool,
+        cursor: Optional[str],
+    ) -> Optional[Tuple[List[Dict], Optional[str]]]:
         url = f"{self.base_url}{endpoint}"
+        headers = self._conditional_headers(endpoint) if conditional else {}
+
+        self.logger.debug("Fetching API endpoint", url=url, conditional=bool(headers), cursor=cursor)
 
-        self.logger.debug("Fetching API endpoint", url=url)
+        async with self.session.get(url, headers=headers, params=self._page_params(cursor)) as response:
+            if response.status == 304:
+                self.logger.info("API endpoint not modified", url=url)
+                return None
 
-        async with self.session.get(url) as response:
             response.raise_for_status()
 
             data = await response.json()
 
+            next_cursor = None
+            if isinstance(data, dict) and isinstance(data.get('items'), list):
+                data, next_cursor = data['items'], data.get('next_cursor')
+
             if not isinstance(data, list):
                 raise ValueError(f"Expected list response, got {type(data)}")
 
-            self.logger.info(
-                "API endpoint fetched",
-                url=url,
-                status=response.status,
-                count=len(data),
-            )
+            if cursor is None:
+                self._stage_validators(endpoint, response)
+
+            return data, next_cursor
+
+    async def _fetch_endpoint(self, endpoint: str, conditional: bool = False) -> Optional[List[Dict]]:
+        await self._ensure_session()
 
-            return data
+        page = await self._fetch_page(endpoint, conditional, None)
+        if page is None:
+            return None
 
-    async def fetch_vessels(self) -> List[Dict]:
+        data, cursor = page
+        pages = 1
+        while cursor:
+            items, cursor = await self._fetch_page(endpoint, False, cursor)
+            data.extend(items)
+            pages += 1
+
+        self.logger.info(
+            "API endpoint fetched",
+            url=f"{self.base_url}{endpoint}",
+            pages=pages,
+            count=len(data),
+        )
+
+        return data
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
+        reraise=True,
+    )
+    async def _open_stream(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        params: Dict[str, str],
+    ) -> aiohttp.ClientResponse:
+        response = await self.session.get(url, headers=headers, params=params)
+
+        if response.status != 304 and response.status >= 400:
+            response.release()
+            response.raise_for_status()
+
+        return response
+
+    async def stream_vessels(
+        self,
+        on_batch: Callable[[List[Dict]], Awaitable[None]],
+        conditional: bool = False,
+        batch_size: int = 5000,
+    ) -> Optional[int]:
+        await self._ensure_session()
+
+        endpoint = self.vessels_endpoint
+        url = f"{self.base_url}{endpoint}"
+        headers = self._conditional_headers(endpoint) if conditional else {}
+
+        self.logger.debug("Streaming API endpoint", url=url, conditional=bool(headers))
+
+        count = 0
+        pages = 0
+        batch = []
+        cursor = None
+
+        while True:
+            response = await self._open_stream(
+                url, headers if cursor is None else {}, self._page_params(cursor)
+            )
+            try:
+                if response.status == 304:
+                    self.logger.info("API endpoint not modified", url=url)
+                    return None
+
+                page = {}
+                async for item in iter_json_array(response.content, envelope=page):
+                    batch.append(item)
+                    if len(batch) >= batch_size:
+                        await on_batch(batch)
+                        count += len(batch)
+                        batch = []
+
+                if cursor is None:
+                    self._stage_validators(endpoint, response)
+            finally:
+                response.release()
+
+            pages += 1
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+
+        if batch:
+            await on_batch(batch)
+            count += len(batch)
+
+        self.logger.info("Vessels streamed", url=url, pages=pages, count=count)
+
+        return count
+
+    async def fetch_vessels(self, conditional: bool = False) -> Optional[List[Dict]]:
         try:
-            vessels = await self._fetch_endpoint(self.vessels_endpoint)
-            self.logger.info("Vessels fetched", count=len(vessels))
+            vessels = await self._fetch_endpoint(self.vessels_endpoint, conditional)
+            if vessels is not None:
+                self.logger.info("Vessels fetched", count=len(vessels))
             return vessels
         except Exception as e:
             self.logger.error("Failed to fetch vessels", error=str(e))
             raise
 
-    async def fetch_lists(self) -> List[Dict]:
+    async def fetch_lists(self, conditional: bool = False) -> Optional[List[Dict]]:
         try:
-            lists = await self._fetch_endpoint(self.lists_endpoint)
-            self.logger.info("Lists fetched", count=len(lists))
+            lists = await self._fetch_endpoint(self.lists_endpoint, conditional)
+            if lists is not None:
+                self.logger.info("Lists fetched", count=len(lists))
             return lists
         except Exception as e:
             self.logger.error("Failed to fetch lists", error=str(e))
             raise
 
-    async def fetch_all(self) -> Tuple[List[Dict], List[Dict]]:
-        self.logger.info("Fetching watchlist data")
+    async def fetch_all(
+        self,
+        conditional: bool = False,
+    ) -> Tuple[Optional[List[Dict]], Optional[List[Dict]]]:
+        self.logger.info("Fetching watchlist data", conditional=conditional)
 
         try:
             vessels, lists = await asyncio.gather(
-                self.fetch_vessels(),
-                self.fetch_lists(),
+                self.fetch_vessels(conditional),
+                self.fetch_lists(conditional),
             )
 
             self.logger.info(
                 "Watchlist data fetched",
-                vessels=len(vessels),
-                lists=len(lists),
+                vessels=len(vessels) if vessels is not None else "not_modified",
+                lists=len(lists) if lists is not None else "not_modified",
             )
 
             return vessels, lists
@@ -165,6 +437,38 @@ class WatchlistAPIClient(LoggerMixin):
             self.logger.error("Failed to update vessel by IMO", imo=imo, error=str(e))
             return {"success": False, "error": str(e)}
 
+    async def update_vessels_by_imo_bulk(self, updates: List[Dict]) -> Dict:
+        await self._ensure_session()
+
+        url = f"{self.base_url}/vessels/update-by-imo/bulk"
+
+        try:
+            async with self.session.post(url, json={'updates': updates}) as response:
+                if response.status in (404, 405):
+                    return {"success": False, "unsupported": True}
+
+                if response.status == 200:
+                    result = await response.json()
+                    self.logger.info(
+                        "Vessels updated by IMO (bulk)",
+                        requested=len(updates),
+                        updated=result.get('updated', 0),
+                    )
+                    return {"success": True, **result}
+
+                error_text = await response.text()
+                self.logger.warning(
+                    "Bulk vessel update failed",
+                    requested=len(updates),
+                    status=response.status,
+                    error=error_text,
+                )
+                return {"success": False, "error": error_text}
+
+        except Exception as e:
+            self.logger.error("Failed to bulk update vessels by IMO", error=str(e))
+            return {"success": False, "error": str(e)}
+
     async def test_connection(self) -> Dict:
         result = {
             "success": False,
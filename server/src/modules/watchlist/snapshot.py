@@ -0,0 +1,110 @@
+
+import gc
+import sys
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from types import FunctionType, MappingProxyType, ModuleType
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+VesselRow = Tuple[Optional[str], Optional[str], Optional[str]]
+
+SIZE_SAMPLE_ROWS = 256
+
+
+@dataclass(frozen=True)
+class WatchlistSnapshot:
+
+    mmsi_index: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    imo_index: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    lists: Mapping[str, Mapping] = field(default_factory=lambda: MappingProxyType({}))
+    vessel_rows: FrozenSet[VesselRow] = frozenset()
+    built_at: Optional[float] = None
+    build_time_ms: float = 0.0
+    size_bytes: int = 0
+
+    def get_stats(self) -> Dict:
+
+        return {
+            'mmsi_entries': len(self.mmsi_index),
+            'imo_entries': len(self.imo_index),
+            'lists': len(self.lists),
+            'vessel_rows': len(self.vessel_rows),
+            'built_at': self.built_at,
+            'build_time_ms': self.build_time_ms,
+            'size_bytes': self.size_bytes,
+        }
+
+
+def _deep_sizeof(*roots) -> int:
+    seen = set()
+    size = 0
+    pending = list(roots)
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+
+    return size
+
+
+def _estimate_size(
+    mmsi_index: Dict[str, str],
+    imo_index: Dict[str, str],
+    lists: Mapping[str, Mapping],
+    rows: FrozenSet[VesselRow],
+) -> int:
+    # Index keys and values are the same string objects as the row values, so
+    # only the rows are sampled; the few list entries are measured exactly.
+    size = sys.getsizeof(mmsi_index) + sys.getsizeof(imo_index) + sys.getsizeof(rows)
+
+    sample = list(islice(rows, SIZE_SAMPLE_ROWS))
+    if sample:
+        sampled = sum(
+            sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row if value is not None)
+            for row in sample
+        )
+        size += sampled * len(rows) // len(sample)
+
+    return size + _deep_sizeof(lists)
+
+
+def build_snapshot(rows: Iterable[VesselRow], lists: Mapping[str, Mapping]) -> WatchlistSnapshot:
+    start = time.perf_counter()
+
+    mmsi_index: Dict[str, str] = {}
+    imo_index: Dict[str, str] = {}
+    vessel_rows = []
+
+    for row in rows:
+        vessel_rows.append(row)
+        mmsi, imo, list_id = row
+        if not list_id:
+            continue
+        if mmsi:
+            mmsi_index[mmsi] = list_id
+        if imo:
+            imo_index[imo] = list_id
+
+    frozen_lists = {
+        list_id: MappingProxyType(dict(info))
+        for list_id, info in lists.items()
+    }
+
+    frozen_rows = frozenset(vessel_rows)
+    size_bytes = _estimate_size(mmsi_index, imo_index, frozen_lists, frozen_rows)
+    build_time_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    return WatchlistSnapshot(
+        mmsi_index=MappingProxyType(mmsi_index),
+        imo_index=MappingProxyType(imo_index),
+        lists=MappingProxyType(frozen_lists),
+        vessel_rows=frozen_rows,
+        built_at=time.time(),
+        build_time_ms=build_time_ms,
+        size_bytes=size_bytes,
+    )
@@ -0,0 +1,184 @@
+
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.core.logger import LoggerMixin
+from src.modules.watchlist.api_client import WatchlistAPIClient
+
+
+class VesselUpdateQueue(LoggerMixin):
+
+    def __init__(
+        self,
+        api_client: WatchlistAPIClient,
+        flush_interval: int = 5000,
+        max_concurrency: int = 4,
+        batch_size: int = 500,
+        max_pending: int = 10000,
+        max_retries: int = 3,
+        use_bulk: bool = True,
+    ):
+        self._logger_context = {'component': 'vessel-update-queue'}
+        self.api_client = api_client
+        self.flush_interval = flush_interval / 1000.0
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.use_bulk = use_bulk
+
+        self.pending: Dict[str, Dict] = {}
+        self._attempts: Dict[str, int] = {}
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+        self.stats = {
+            'queued': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'pushed': 0,
+            'failed': 0,
+            'retried': 0,
+            'flushes': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    def put(self, imo: str, data: Dict) -> None:
+        if imo in self.pending:
+            self.pending[imo] = {**self.pending[imo], **data}
+            self.stats['coalesced'] += 1
+            return
+
+        if len(self.pending) >= self.max_pending:
+            self.stats['dropped'] += 1
+            return
+
+        self.pending[imo] = data
+        self.stats['queued'] += 1
+
+    async def start(self) -> None:
+
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+
+        if self._task:
+            self._stopping.set()
+            await asyncio.shield(self._task)
+            self._task = None
+
+        await asyncio.shield(self.flush())
+
+    async def _flush_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error("Vessel update flush failed", error=str(e))
+
+    @staticmethod
+    def _encode(data: Dict) -> Dict:
+        if isinstance(data.get('lastposition'), dict):
+            return {**data, 'lastposition': json.dumps(data['lastposition'])}
+        return data
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+
+        start = time.perf_counter()
+
+        pending, self.pending = self.pending, {}
+        items = [(imo, self._encode(data)) for imo, data in pending.items()]
+
+        if self.use_bulk:
+            batches = [
+                items[i:i + self.batch_size]
+                for i in range(0, len(items), self.batch_size)
+            ]
+            results = await asyncio.gather(*(self._push_bulk(batch) for batch in batches))
+            failed = [item for batch_failed in results for item in batch_failed]
+        else:
+            results = await asyncio.gather(*(self._push_one(imo, data) for imo, data in items))
+            failed = [item for item, pushed in zip(items, results) if not pushed]
+
+        self._requeue(failed)
+
+        self.stats['flushes'] += 1
+        self.stats['last_flush_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+        self.logger.debug(
+            "Vessel updates flushed",
+            count=len(items),
+            failed=len(failed),
+            duration_ms=self.stats['last_flush_ms'],
+        )
+
+    def _requeue(self, failed: List[Tuple[str, Dict]]) -> None:
+        for imo, data in failed:
+            attempts = self._attempts.get(imo, 0) + 1
+
+            if imo in self.pending:
+                self.pending[imo] = {**data, **self.pending[imo]}
+            elif attempts > self.max_retries or len(self.pending) >= self.max_pending:
+                self._attempts.pop(imo, None)
+                self.stats['dropped'] += 1
+                continue
+            else:
+                self.pending[imo] = data
+
+            self._attempts[imo] = attempts
+            self.stats['retried'] += 1
+
+    async def _push_bulk(self, batch: List[tuple]) -> List[tuple]:
+        async with self._semaphore:
+            result = await self.api_client.update_vessels_by_imo_bulk(
+                [{'imo': imo, 'fields': data} for imo, data in batch]
+            )
+
+        if result.get('unsupported'):
+            self.logger.info("Bulk update endpoint not available, falling back to per-IMO updates")
+            self.use_bulk = False
+            pushed = await asyncio.gather(*(self._push_one(imo, data) for imo, data in batch))
+            return [item for item, ok in zip(batch, pushed) if not ok]
+
+        if result.get('success'):
+            self.stats['pushed'] += len(batch)
+            for imo, _ in batch:
+                self._attempts.pop(imo, None)
+            return []
+
+        self.stats['failed'] += len(batch)
+        return batch
+
+    async def _push_one(self, imo: str, data: Dict) -> bool:
+        async with self._semaphore:
+            result = await self.api_client.update_vessel_by_imo(imo, data)
+
+        if result.get('success'):
+            self.stats['pushed'] += 1
+            self._attempts.pop(imo, None)
+            return True
+
+        self.stats['failed'] += 1
+        return False
+
+    def get_stats(self) -> Dict:
+
+        return {
+            **self.stats,
+            'pending': len(self.pending),
+            'bulk': self.use_bulk,
+        }
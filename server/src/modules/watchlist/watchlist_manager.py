@@ -1,10 +1,26 @@
 
 import asyncio
-from typing import Dict, List, Optional, Callable
+import time
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from src.core.logger import LoggerMixin
 from src.modules.database import DatabaseManager
 from src.modules.watchlist.api_client import WatchlistAPIClient
+from src.modules.watchlist.snapshot import VesselRow, WatchlistSnapshot, build_snapshot
+from src.modules.watchlist.update_queue import VesselUpdateQueue
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _process_peak_rss_mb() -> Optional[float]:
+    # ru_maxrss is the high-water mark over the whole process lifetime, so a
+    # single sync can only be measured by how far it pushes that mark up.
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
 
 class WatchlistManager(LoggerMixin):
@@ -15,18 +31,21 @@ class WatchlistManager(LoggerMixin):
         db_manager: DatabaseManager,
         sync_mode: str = "manual",
         sync_interval: int = 3600000,
+        db_chunk_size: int = 5000,
+        snapshot_thread_threshold: int = 50000,
+        update_queue: Optional[VesselUpdateQueue] = None,
     ):
         self._logger_context = {'component': 'watchlist-manager'}
         self.api_client = api_client
         self.db_manager = db_manager
         self.sync_mode = sync_mode
         self.sync_interval = sync_interval / 1000.0
+        self.db_chunk_size = db_chunk_size
+        self.snapshot_thread_threshold = snapshot_thread_threshold
 
-        self.mmsi_cache: Dict[str, str] = {}
+        self.snapshot = WatchlistSnapshot()
 
-        self.imo_cache: Dict[str, str] = {}
-
-        self.lists_cache: Dict[str, Dict] = {}
+        self._sync_lock = asyncio.Lock()
 
         self.sync_task: Optional[asyncio.Task] = None
 
@@ -36,31 +55,54 @@ class WatchlistManager(LoggerMixin):
 
         self.push_updates_enabled: bool = True
 
+        self.update_queue = update_queue or VesselUpdateQueue(api_client)
+
+    @property
+    def mmsi_cache(self) -> Mapping[str, str]:
+        return self.snapshot.mmsi_index
+
+    @property
+    def imo_cache(self) -> Mapping[str, str]:
+        return self.snapshot.imo_index
+
+    @property
+    def lists_cache(self) -> Mapping[str, Mapping]:
+        return self.snapshot.lists
+
+    async def _publish_snapshot(self, rows: Iterable[VesselRow], lists: Mapping[str, Mapping]) -> None:
+        rows = list(rows)
+
+        if len(rows) >= self.snapshot_thread_threshold:
+            snapshot = await asyncio.to_thread(build_snapshot, rows, lists)
+        else:
+            snapshot = build_snapshot(rows, lists)
+
+        self.snapshot = snapshot
+
+        self.logger.info(
+            "Watchlist snapshot published",
+            mmsi_entries=len(snapshot.mmsi_index),
+            imo_entries=len(snapshot.imo_index),
+            lists=len(snapshot.lists),
+            build_time_ms=snapshot.build_time_ms,
+        )
+
     async def load_from_database(self) -> None:
         
         try:
             vessels = await self.db_manager.get_all_vessels()
-
-            self.mmsi_cache = {
-                v['mmsi']: v['list_id']
-                for v in vessels
-                if v.get('mmsi') and v.get('list_id')
-            }
-
-            self.imo_cache = {
-                v['imo']: v['list_id']
-                for v in vessels
-                if v.get('imo') and v.get('list_id')
-            }
-
             lists = await self.db_manager.get_all_lists()
-            self.lists_cache = {
-                l['list_id']: {
-                    'list_name': l.get('list_name'),
-                    'color': l.get('color'),
-                }
-                for l in lists
-            }
+
+            await self._publish_snapshot(
+                ((v.get('mmsi'), v.get('imo'), v.get('list_id')) for v in vessels),
+                {
+                    l['list_id']: {
+                        'list_name': l.get('list_name'),
+                        'color': l.get('color'),
+                    }
+                    for l in lists
+                },
+            )
 
             self.logger.info(
                 "Watchlist loaded from database",
@@ -73,67 +115,148 @@ class WatchlistManager(LoggerMixin):
             self.logger.error("Failed to load watchlist from database", error=str(e))
             raise
 
-    async def sync_from_api(self) -> Dict:
-        try:
-            self.logger.info("Syncing watchlist from API")
+    @staticmethod
+    def _normalize_vessel(v: Dict) -> VesselRow:
+        return (v.get('mmsi'), v.get('imo'), v.get('list_id') or v.get('listId'))
 
-            vessels, lists = await self.api_client.fetch_all()
+    @staticmethod
+    def _normalize_list(l: Dict) -> Dict:
+        return {
+            'list_id': l.get('list_id') or l.get('listId') or l.get('id'),
+            'list_name': l.get('list_name') or l.get('listName') or l.get('name'),
+            'color': l.get('color'),
+        }
 
-            normalized_vessels = []
-            for v in vessels:
-                normalized = {
-                    'mmsi': v.get('mmsi'),
-                    'imo': v.get('imo'),
-                    'list_id': v.get('list_id') or v.get('listId'),
-                }
-                normalized_vessels.append(normalized)
-
-            normalized_lists = []
-            for l in lists:
-                list_id = l.get('list_id') or l.get('listId') or l.get('id')
-                normalized = {
-                    'list_id': list_id,
-                    'list_name': l.get('list_name') or l.get('listName') or l.get('name'),
-                    'color': l.get('color'),
+    async def _apply_lists_delta(
+        self,
+        base: WatchlistSnapshot,
+        lists: List[Dict],
+    ) -> Tuple[Dict[str, Dict], Dict]:
+        incoming = {}
+        for l in lists:
+            normalized = self._normalize_list(l)
+            if normalized['list_id']:
+                incoming[normalized['list_id']] = {
+                    'list_name': normalized['list_name'],
+                    'color': normalized['color'],
                 }
-                normalized_lists.append(normalized)
 
-            await self.db_manager.upsert_lists(normalized_lists)
-            await self.db_manager.upsert_vessels(normalized_vessels)
+        changed = [
+            {'list_id': list_id, **info}
+            for list_id, info in incoming.items()
+            if dict(base.lists.get(list_id, {})) != info
+        ]
+        removed = [list_id for list_id in base.lists if list_id not in incoming]
 
-            self.mmsi_cache = {
-                v['mmsi']: v['list_id']
-                for v in normalized_vessels
-                if v.get('mmsi') and v.get('list_id')
-            }
+        await self.db_manager.delete_lists(removed)
+        await self.db_manager.upsert_lists(changed)
 
-            self.imo_cache = {
-                v['imo']: v['list_id']
-                for v in normalized_vessels
-                if v.get('imo') and v.get('list_id')
-            }
+        return incoming, {'changed': len(changed), 'removed': len(removed)}
 
-            self.lists_cache = {
-                l['list_id']: {
-                    'list_name': l.get('list_name'),
-                    'color': l.get('color'),
-                }
-                for l in normalized_lists
-                if l.get('list_id')
-            }
+    async def _sync_vessels_stream(
+        self,
+        base: WatchlistSnapshot,
+        conditional: bool,
+    ) -> Tuple[Optional[Dict[VesselRow, None]], Dict]:
+        incoming: Dict[VesselRow, None] = {}
+        added_count = 0
+
+        async def on_batch(batch: List[Dict]) -> None:
+            nonlocal added_count
+            added = []
+
+            for v in batch:
+                row = self._normalize_vessel(v)
+                if row in incoming:
+                    continue
+                incoming[row] = None
+                if row not in base.vessel_rows:
+                    added.append({'mmsi': row[0], 'imo': row[1], 'list_id': row[2]})
+
+            if added:
+                await self.db_manager.upsert_vessels(added)
+                added_count += len(added)
+
+        count = await self.api_client.stream_vessels(
+            on_batch,
+            conditional=conditional,
+            batch_size=self.db_chunk_size,
+        )
+        if count is None:
+            return None, {'added': 0, 'removed': 0}
+
+        removed = [row for row in base.vessel_rows if row not in incoming]
+
+        await self.db_manager.delete_vessels([
+            {'mmsi': mmsi, 'imo': imo, 'list_id': list_id}
+            for mmsi, imo, list_id in removed
+        ])
+
+        return incoming, {'added': added_count, 'removed': len(removed)}
+
+    async def sync_from_api(self, force: bool = False) -> Dict:
+        async with self._sync_lock:
+            return await self._sync_from_api(force)
+
+    async def _sync_from_api(self, force: bool) -> Dict:
+        try:
+            self.logger.info("Syncing watchlist from API", force=force)
+
+            base = self.snapshot
+            peak_before = _process_peak_rss_mb()
+
+            try:
+                lists = await self.api_client.fetch_lists(conditional=not force)
+                new_lists, lists_delta = base.lists, {'changed': 0, 'removed': 0}
+                if lists is not None:
+                    new_lists, lists_delta = await self._apply_lists_delta(base, lists)
+
+                rows, vessels_delta = await self._sync_vessels_stream(base, conditional=not force)
+
+                changed = (
+                    any(lists_delta.values())
+                    or any(vessels_delta.values())
+                )
+                if changed:
+                    await self._publish_snapshot(
+                        rows if rows is not None else base.vessel_rows,
+                        new_lists,
+                    )
+            except Exception:
+                self.api_client.reset_validators()
+                raise
+
+            self.api_client.commit_validators()
 
-            import time
             self.last_sync_time = time.time()
 
+            not_modified = rows is None and lists is None
+            peak_after = _process_peak_rss_mb()
+            peak_rss_growth_mb = (
+                round(peak_after - peak_before, 1) if peak_after is not None else None
+            )
+
             self.logger.info(
                 "Watchlist synced",
-                vessels=len(vessels),
-                lists=len(lists),
+                not_modified=not_modified,
+                vessels=len(self.snapshot.vessel_rows),
+                lists=len(self.lists_cache),
+                vessels_added=vessels_delta['added'],
+                vessels_removed=vessels_delta['removed'],
+                lists_changed=lists_delta['changed'],
+                lists_removed=lists_delta['removed'],
+                peak_rss_growth_mb=peak_rss_growth_mb,
             )
 
             return {
-                "vessels": len(vessels),
-                "lists": len(lists),
+                "vessels": len(self.snapshot.vessel_rows),
+                "lists": len(self.lists_cache),
+                "not_modified": not_modified,
+                "vessels_added": vessels_delta['added'],
+                "vessels_removed": vessels_delta['removed'],
+                "lists_changed": lists_delta['changed'],
+                "lists_removed": lists_delta['removed'],
+                "peak_rss_growth_mb": peak_rss_growth_mb,
                 "success": True,
             }
 
@@ -171,19 +294,21 @@ class WatchlistManager(LoggerMixin):
             self.sync_task = None
 
     def is_watchlisted(self, mmsi: str = None, imo: str = None) -> bool:
-        if mmsi and mmsi in self.mmsi_cache:
+        snapshot = self.snapshot
+        if mmsi and mmsi in snapshot.mmsi_index:
             return True
-        if imo and imo in self.imo_cache:
+        if imo and imo in snapshot.imo_index:
             return True
         return False
 
-    def get_match(self, mmsi: str) -> Optional[Dict]:
-        list_id = self.mmsi_cache.get(mmsi)
+    def get_match(self, mmsi: str, snapshot: Optional[WatchlistSnapshot] = None) -> Optional[Dict]:
+        snapshot = snapshot or self.snapshot
+        list_id = snapshot.mmsi_index.get(mmsi)
 
         if not list_id:
             return None
 
-        list_info = self.lists_cache.get(list_id, {})
+        list_info = snapshot.lists.get(list_id, {})
 
         return {
             "mmsi": mmsi,
@@ -193,13 +318,14 @@ class WatchlistManager(LoggerMixin):
             "matched_by": "mmsi",
         }
 
-    def get_match_by_imo(self, imo: str) -> Optional[Dict]:
-        list_id = self.imo_cache.get(imo)
+    def get_match_by_imo(self, imo: str, snapshot: Optional[WatchlistSnapshot] = None) -> Optional[Dict]:
+        snapshot = snapshot or self.snapshot
+        list_id = snapshot.imo_index.get(imo)
 
         if not list_id:
             return None
 
-        list_info = self.lists_cache.get(list_id, {})
+        list_info = snapshot.lists.get(list_id, {})
 
         return {
             "imo": imo,
@@ -212,14 +338,15 @@ class WatchlistManager(LoggerMixin):
     def check_message(self, message: Dict) -> Optional[Dict]:
         mmsi = message.get('mmsi')
         imo = message.get('imo')
+        snapshot = self.snapshot
 
         match = None
 
         if mmsi:
-            match = self.get_match(mmsi)
+            match = self.get_match(mmsi, snapshot)
 
         if not match and imo:
-            match = self.get_match_by_imo(imo)
+            match = self.get_match_by_imo(imo, snapshot)
             if match and mmsi:
                 match['mmsi'] = mmsi
 
@@ -247,7 +374,6 @@ class WatchlistManager(LoggerMixin):
         if message.get('flag') or message.get('country'):
             update_data['flag'] = message.get('flag') or message.get('country')
         if message.get('lat') is not None and message.get('lon') is not None:
-            import json
             position_data = {
                 'lat': message.get('lat'),
                 'lon': message.get('lon'),
@@ -278,25 +404,10 @@ class WatchlistManager(LoggerMixin):
             if message.get('status') is not None:
                 position_data['status'] = message.get('status')
 
-            update_data['lastposition'] = json.dumps(position_data)
+            update_data['lastposition'] = position_data
 
         if update_data:
-            try:
-                asyncio.create_task(self._push_vessel_update(imo, update_data))
-            except RuntimeError:
-                self.logger.debug("Cannot schedule vessel update - no event loop")
-
-    async def _push_vessel_update(self, imo: str, data: Dict) -> None:
-        try:
-            result = await self.api_client.update_vessel_by_imo(imo, data)
-            if result.get('success'):
-                self.logger.debug(
-                    "Vessel update pushed",
-                    imo=imo,
-                    updated=result.get('updated', 0),
-                )
-        except Exception as e:
-            self.logger.warning("Failed to push vessel update", imo=imo, error=str(e))
+            self.update_queue.put(imo, update_data)
 
     def get_stats(self) -> Dict:
         
@@ -307,13 +418,14 @@ class WatchlistManager(LoggerMixin):
             'lists_count': len(self.lists_cache),
             'sync_mode': self.sync_mode,
             'last_sync_time': self.last_sync_time,
+            'snapshot': self.snapshot.get_stats(),
+            'update_queue': self.update_queue.get_stats(),
         }
 
     async def clear(self) -> None:
         
-        self.mmsi_cache.clear()
-        self.imo_cache.clear()
-        self.lists_cache.clear()
+        self.snapshot = WatchlistSnapshot()
+        self.api_client.reset_validators()
         await self.db_manager.clear_all_vessels()
         await self.db_manager.clear_all_lists()
         self.logger.info("Watchlist cleared")
@@ -102,8 +102,8 @@ async def get_ais_stats():
 @router.post("/refresh-cache")
 async def refresh_imo_cache():
     
-    ais_client.invalidate_cache()
-    return {"message": "Cache invalidated, will refresh on next message"}
+    count = await ais_client.reload_imo_index()
+    return {"message": "IMO index reloaded", "unique_imos": count}
 
 
 @router.get("/updates")
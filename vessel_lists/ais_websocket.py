@@ -3,13 +3,16 @@ import asyncio
 import json
 import logging
 import ssl
+import threading
+import time
 from datetime import datetime
-from typing import Optional, Dict, List, Callable
+from typing import Optional, Dict, List, Callable, Iterable, Set, Tuple
 from dataclasses import dataclass, field
 
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
 
+from sqlalchemy import event, inspect, select, update
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from config import config as app_config
@@ -30,6 +33,8 @@ class AISWebSocketConfig:
     reconnect_interval: float = field(default_factory=lambda: app_config.websocket.reconnect_interval)
     ping_interval: float = field(default_factory=lambda: app_config.websocket.ping_interval)
     ping_timeout: float = field(default_factory=lambda: app_config.websocket.ping_timeout)
+    flush_interval: float = field(default_factory=lambda: app_config.websocket.flush_interval)
+    max_pending: int = field(default_factory=lambda: app_config.websocket.max_pending)
 
 
 @dataclass
@@ -43,6 +48,13 @@ class AISWebSocketStats:
     last_update_time: Optional[datetime] = None
     connection_errors: int = 0
     reconnect_count: int = 0
+    updates_queued: int = 0
+    updates_coalesced: int = 0
+    flushes: int = 0
+    flush_errors: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    pending_updates: int = 0
     updates_log: List[Dict] = field(default_factory=list)
 
     def to_dict(self) -> Dict:
@@ -55,10 +67,219 @@ class AISWebSocketStats:
             "last_update_time": self.last_update_time.isoformat() if self.last_update_time else None,
             "connection_errors": self.connection_errors,
             "reconnect_count": self.reconnect_count,
+            "updates_queued": self.updates_queued,
+            "updates_coalesced": self.updates_coalesced,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+            "pending_updates": self.pending_updates,
             "recent_updates": self.updates_log[-20:],
         }
 
 
+ImoChange = Tuple[int, Optional[str], Optional[str]]
+
+
+def _normalize_imo(imo: Optional[str]) -> Optional[str]:
+    if not imo:
+        return None
+    return imo.strip() or None
+
+
+class ImoIndex:
+
+    def __init__(self):
+        self._index: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+        self._loading = False
+        self._replay: List[ImoChange] = []
+        self.stale = True
+        self.loaded_at: Optional[datetime] = None
+        self.load_time_ms = 0.0
+        self.write_throughs = 0
+
+    def load(self, db: Session) -> int:
+        start = time.perf_counter()
+
+        with self._lock:
+            self._loading = True
+            self._replay = []
+
+        try:
+            index: Dict[str, Set[int]] = {}
+            rows = db.query(models.Vessel.id, models.Vessel.imo).filter(
+                models.Vessel.imo.isnot(None),
+                models.Vessel.imo != ""
+            )
+            for vessel_id, imo in rows:
+                imo = _normalize_imo(imo)
+                if imo:
+                    index.setdefault(imo, set()).add(vessel_id)
+        except BaseException:
+            with self._lock:
+                self._loading = False
+                self._replay = []
+            raise
+
+        with self._lock:
+            self._apply(index, self._replay)
+            self._index = index
+            self._loading = False
+            self._replay = []
+            self.stale = False
+            self.loaded_at = datetime.utcnow()
+            self.load_time_ms = round((time.perf_counter() - start) * 1000, 3)
+
+        return len(index)
+
+    @staticmethod
+    def _apply(index: Dict[str, Set[int]], changes: Iterable[ImoChange]) -> None:
+        for vessel_id, old_imo, new_imo in changes:
+            if old_imo and old_imo in index:
+                index[old_imo].discard(vessel_id)
+                if not index[old_imo]:
+                    del index[old_imo]
+            if new_imo:
+                index.setdefault(new_imo, set()).add(vessel_id)
+
+    def apply(self, changes: List[ImoChange]) -> None:
+        with self._lock:
+            self._apply(self._index, changes)
+            if self._loading:
+                self._replay.extend(changes)
+            self.write_throughs += len(changes)
+
+    def get(self, imo: str) -> List[int]:
+        with self._lock:
+            return list(self._index.get(imo, ()))
+
+    def get_stats(self) -> Dict:
+        
+        return {
+            "unique_imos": len(self._index),
+            "stale": self.stale,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "load_time_ms": self.load_time_ms,
+            "write_throughs": self.write_throughs,
+        }
+
+
+imo_index = ImoIndex()
+
+
+def _imo_history(obj) -> Tuple[Optional[str], Optional[str]]:
+    history = inspect(obj).attrs.imo.history
+    old_imo = history.deleted[0] if history.deleted else obj.imo
+    return _normalize_imo(old_imo), _normalize_imo(obj.imo)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_imo_changes(session, flush_context):
+    changes = session.info.setdefault("imo_changes", [])
+
+    for obj in session.new:
+        if isinstance(obj, models.Vessel):
+            changes.append((obj.id, None, _normalize_imo(obj.imo)))
+
+    for obj in session.deleted:
+        if isinstance(obj, models.Vessel):
+            changes.append((obj.id, _imo_history(obj)[0], None))
+
+    for obj in session.dirty:
+        if isinstance(obj, models.Vessel):
+            old_imo, new_imo = _imo_history(obj)
+            if old_imo != new_imo:
+                changes.append((obj.id, old_imo, new_imo))
+
+
+def _select_imos(session: Session, criteria) -> Dict[int, Optional[str]]:
+    query = select(models.Vessel.id, models.Vessel.imo)
+    if criteria is not None:
+        query = query.where(criteria)
+    rows = session.execute(query, execution_options={"autoflush": False})
+    return {vessel_id: _normalize_imo(imo) for vessel_id, imo in rows}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_imo_statement(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+
+    session = orm_execute_state.session
+    if mapper.class_ is models.VesselList:
+        # Vessels of bulk-deleted lists are not visible to the session.
+        if orm_execute_state.is_delete:
+            session.info["imo_index_stale"] = True
+        return
+
+    if mapper.class_ is not models.Vessel:
+        return
+    if not orm_execute_state.execution_options.get("track_imo_changes", True):
+        return
+
+    changes = session.info.setdefault("imo_changes", [])
+    parameters = orm_execute_state.parameters
+
+    if orm_execute_state.is_update and isinstance(parameters, list) and parameters:
+        rows = [row for row in parameters if "imo" in row]
+        if not rows:
+            return
+        if not all("id" in row for row in rows):
+            session.info["imo_index_stale"] = True
+            return
+
+        old_imos = _select_imos(session, models.Vessel.id.in_({row["id"] for row in rows}))
+        changes.extend(
+            (row["id"], old_imos[row["id"]], _normalize_imo(row["imo"]))
+            for row in rows if row["id"] in old_imos
+        )
+        return
+
+    if orm_execute_state.is_insert:
+        # New ids are only known when the statement returns them.
+        if not {"id", "imo"} <= set(orm_execute_state.statement.exported_columns.keys()):
+            session.info["imo_index_stale"] = True
+            return
+
+        frozen = orm_execute_state.invoke_statement().freeze()
+        rows = frozen()
+        if {"id", "imo"} <= set(rows.keys()):
+            changes.extend((row.id, None, _normalize_imo(row.imo)) for row in rows)
+        else:
+            session.info["imo_index_stale"] = True
+        return frozen()
+
+    old_imos = _select_imos(session, orm_execute_state.statement.whereclause)
+    result = orm_execute_state.invoke_statement()
+    new_imos = _select_imos(session, models.Vessel.id.in_(old_imos)) if orm_execute_state.is_update else {}
+    changes.extend(
+        (vessel_id, old_imo, new_imos.get(vessel_id))
+        for vessel_id, old_imo in old_imos.items() if old_imo != new_imos.get(vessel_id)
+    )
+    return result
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_imo_changes(session):
+    changes = session.info.pop("imo_changes", None)
+    if changes:
+        imo_index.apply(changes)
+
+    if session.info.pop("imo_index_stale", False):
+        imo_index.stale = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_imo_changes(session):
+    session.info.pop("imo_changes", None)
+    session.info.pop("imo_index_stale", None)
+
+
 class AISWebSocketClient:
 
     def __init__(self, config: Optional[AISWebSocketConfig] = None):
@@ -67,10 +288,13 @@ class AISWebSocketClient:
         self._ws: Optional[websockets.WebSocketClientProtocol] = None
         self._running = False
         self._task: Optional[asyncio.Task] = None
-        self._imo_cache: Dict[str, List[int]] = {}
-        self._cache_timestamp: Optional[datetime] = None
-        self._cache_ttl = 60
+        self.imo_index = imo_index
+        self._reload_task: Optional[asyncio.Task] = None
         self._on_update_callbacks: List[Callable] = []
+        self._pending: Dict[int, Dict] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
 
     @property
     def ws_url(self) -> str:
@@ -89,110 +313,172 @@ class AISWebSocketClient:
         
         return SessionLocal()
 
-    def _refresh_imo_cache(self) -> None:
-        
-        now = datetime.utcnow()
-
-        if (self._cache_timestamp and
-            (now - self._cache_timestamp).total_seconds() < self._cache_ttl):
-            return
-
+    def _load_imo_index(self) -> int:
         db = self._get_db()
         try:
-            vessels = db.query(models.Vessel).filter(
-                models.Vessel.imo.isnot(None),
-                models.Vessel.imo != ""
-            ).all()
-
-            self._imo_cache.clear()
-            for vessel in vessels:
-                imo = vessel.imo.strip()
-                if imo:
-                    if imo not in self._imo_cache:
-                        self._imo_cache[imo] = []
-                    self._imo_cache[imo].append(vessel.id)
-
-            self._cache_timestamp = now
-            logger.info(f"IMO cache refreshed: {len(self._imo_cache)} unique IMOs tracked")
-
+            return self.imo_index.load(db)
         finally:
             db.close()
 
-    def _update_vessel_from_ais(self, imo: str, ais_data: Dict) -> int:
-        self._refresh_imo_cache()
+    async def reload_imo_index(self) -> int:
+        
+        count = await asyncio.to_thread(self._load_imo_index)
+        logger.info(f"IMO index loaded: {count} unique IMOs tracked in {self.imo_index.load_time_ms} ms")
+        return count
+
+    def _schedule_imo_index_reload(self) -> None:
+        if self._reload_task and not self._reload_task.done():
+            return
+        self._reload_task = asyncio.create_task(self.reload_imo_index())
 
-        vessel_ids = self._imo_cache.get(imo)
+    def _queue_vessel_update(self, imo: str, ais_data: Dict) -> int:
+        if self.imo_index.stale:
+            self._schedule_imo_index_reload()
+
+        vessel_ids = self.imo_index.get(imo)
         if not vessel_ids:
             return 0
 
+        fields = {"imo": imo}
+        if ais_data.get("mmsi"):
+            fields["mmsi"] = str(ais_data["mmsi"])
+        if ais_data.get("name"):
+            fields["name"] = ais_data["name"]
+        if ais_data.get("lat") is not None and ais_data.get("lon") is not None:
+            fields["lastposition"] = json.dumps({
+                "lat": ais_data["lat"],
+                "lon": ais_data["lon"],
+                "speed": ais_data.get("speed"),
+                "course": ais_data.get("course"),
+                "timestamp": datetime.utcnow().isoformat()
+            })
+
+        for vessel_id in vessel_ids:
+            pending = self._pending.get(vessel_id)
+            if pending is not None:
+                pending.update(fields)
+                self.stats.updates_coalesced += 1
+            else:
+                self._pending[vessel_id] = dict(fields)
+                self.stats.updates_queued += 1
+
+        self.stats.pending_updates = len(self._pending)
+        if len(self._pending) >= self.config.max_pending:
+            self._flush_requested.set()
+
+        return len(vessel_ids)
+
+    def _apply_updates(self, batch: Dict[int, Dict]) -> List[Dict]:
         db = self._get_db()
-        updated_count = 0
 
         try:
-            for vessel_id in vessel_ids:
-                vessel = db.query(models.Vessel).filter(
-                    models.Vessel.id == vessel_id
-                ).first()
+            rows = db.query(
+                models.Vessel.id,
+                models.Vessel.mmsi,
+                models.Vessel.name,
+                models.Vessel.list_id
+            ).filter(models.Vessel.id.in_(list(batch))).all()
+
+            now = datetime.utcnow().isoformat()
+            mappings = []
+            update_logs = []
+
+            for vessel in rows:
+                fields = batch[vessel.id]
+                values = {}
+                changes = []
 
-                if not vessel:
-                    continue
+                if fields.get("mmsi") and fields["mmsi"] != vessel.mmsi:
+                    values["mmsi"] = fields["mmsi"]
+                    changes.append(f"MMSI: {vessel.mmsi} → {fields['mmsi']}")
 
-                changes = []
+                if fields.get("name") and fields["name"] != vessel.name:
+                    values["name"] = fields["name"]
+                    changes.append(f"Name: {vessel.name} → {fields['name']}")
 
-                if ais_data.get("mmsi") and ais_data["mmsi"] != vessel.mmsi:
-                    old_mmsi = vessel.mmsi
-                    vessel.mmsi = str(ais_data["mmsi"])
-                    changes.append(f"MMSI: {old_mmsi} → {vessel.mmsi}")
-
-                if ais_data.get("name") and ais_data["name"] != vessel.name:
-                    old_name = vessel.name
-                    vessel.name = ais_data["name"]
-                    changes.append(f"Name: {old_name} → {vessel.name}")
-
-                if ais_data.get("lat") is not None and ais_data.get("lon") is not None:
-                    position = json.dumps({
-                        "lat": ais_data["lat"],
-                        "lon": ais_data["lon"],
-                        "speed": ais_data.get("speed"),
-                        "course": ais_data.get("course"),
-                        "timestamp": datetime.utcnow().isoformat()
-                    })
-                    vessel.lastposition = position
+                if fields.get("lastposition"):
+                    values["lastposition"] = fields["lastposition"]
                     changes.append("Position updated")
 
-                if changes:
-                    db.commit()
-                    updated_count += 1
+                if not changes:
+                    continue
+
+                mappings.append({"id": vessel.id, **values})
+                update_logs.append({
+                    "timestamp": now,
+                    "imo": fields["imo"],
+                    "mmsi": fields.get("mmsi"),
+                    "vessel_id": vessel.id,
+                    "list_id": vessel.list_id,
+                    "changes": changes
+                })
+
+            if mappings:
+                db.execute(update(models.Vessel), mappings)
+                db.commit()
+
+            return update_logs
+
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def flush(self) -> int:
+        
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            self.stats.pending_updates = 0
+            start = time.perf_counter()
+
+            try:
+                update_logs = await asyncio.to_thread(self._apply_updates, batch)
+            except Exception as e:
+                self.stats.flush_errors += 1
+                logger.error(f"Error flushing {len(batch)} vessel updates: {e}")
+                return 0
 
-                    update_log = {
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "imo": imo,
-                        "mmsi": ais_data.get("mmsi"),
-                        "vessel_id": vessel_id,
-                        "list_id": vessel.list_id,
-                        "changes": changes
-                    }
-                    self.stats.updates_log.append(update_log)
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+            self.stats.flushes += 1
+            self.stats.last_flush_ms = elapsed_ms
+            self.stats.max_flush_ms = max(self.stats.max_flush_ms, elapsed_ms)
 
-                    if len(self.stats.updates_log) > 100:
-                        self.stats.updates_log = self.stats.updates_log[-100:]
+            if update_logs:
+                self.stats.vessels_updated += len(update_logs)
+                self.stats.last_update_time = datetime.utcnow()
+                self.stats.updates_log.extend(update_logs)
 
-                    logger.info(f"Updated vessel {vessel_id} (IMO: {imo}): {', '.join(changes)}")
+                if len(self.stats.updates_log) > 100:
+                    self.stats.updates_log = self.stats.updates_log[-100:]
 
+                logger.info(f"Flushed {len(update_logs)} vessel updates in {elapsed_ms} ms")
+
+                for update_log in update_logs:
                     for callback in self._on_update_callbacks:
                         try:
                             callback(update_log)
                         except Exception as e:
                             logger.error(f"Callback error: {e}")
 
-            return updated_count
+            return len(update_logs)
 
-        except Exception as e:
-            logger.error(f"Error updating vessel: {e}")
-            db.rollback()
-            return 0
-        finally:
-            db.close()
+    async def _flush_loop(self) -> None:
+        
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(),
+                    timeout=self.config.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_requested.clear()
+            await self.flush()
 
     async def _handle_message(self, message: str) -> None:
         
@@ -207,11 +493,7 @@ class AISWebSocketClient:
                 imo = data.get("imo")
                 if imo:
                     self.stats.messages_with_imo += 1
-
-                    updated = self._update_vessel_from_ais(str(imo), data)
-                    if updated > 0:
-                        self.stats.vessels_updated += updated
-                        self.stats.last_update_time = datetime.utcnow()
+                    self._queue_vessel_update(str(imo), data)
 
             elif msg_type == "connected":
                 logger.info(f"Connected to server: {data.get('message')}")
@@ -253,7 +535,8 @@ class AISWebSocketClient:
                     self.stats.connected = True
                     logger.info("WebSocket connected!")
 
-                    self._refresh_imo_cache()
+                    if self.imo_index.stale:
+                        await self.reload_imo_index()
 
                     async for message in ws:
                         if not self._running:
@@ -287,6 +570,7 @@ class AISWebSocketClient:
 
         self._running = True
         self._task = asyncio.create_task(self._connect_loop())
+        self._flush_task = asyncio.create_task(self._flush_loop())
         logger.info("AIS WebSocket client started")
 
     async def stop(self) -> None:
@@ -303,6 +587,16 @@ class AISWebSocketClient:
             except asyncio.CancelledError:
                 pass
 
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush()
+
         self.stats.connected = False
         logger.info("AIS WebSocket client stopped")
 
@@ -328,7 +622,10 @@ class AISWebSocketClient:
 
     def get_stats(self) -> Dict:
         
-        return self.stats.to_dict()
+        return {
+            **self.stats.to_dict(),
+            "imo_index": self.imo_index.get_stats(),
+        }
 
     def on_update(self, callback: Callable) -> None:
         
@@ -336,7 +633,7 @@ class AISWebSocketClient:
 
     def invalidate_cache(self) -> None:
         
-        self._cache_timestamp = None
+        self.imo_index.stale = True
 
 
 ais_client = AISWebSocketClient()
@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Depends, Response, Query, HTTPException, Request
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, aliased, contains_eager
+from sqlalchemy import distinct, func
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 import csv
 import io
 
-import models, schemas, database
+import models, schemas, database, queries, search_index
+from cache import GenerationCache, cached_json_response, data_generation
+from config import config
 from security import sanitize_filename, audit_log
 
 router = APIRouter()
 
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+analytics_cache = GenerationCache(data_generation)
+
 def get_db():
     db = database.SessionLocal()
     try:
@@ -18,6 +26,29 @@ def get_db():
         db.close()
 
 
+def stream_csv(header: list, rows: Iterable) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_query(build_query: Callable[[Session], Any]) -> Iterator:
+    db = database.SessionLocal()
+    try:
+        yield from build_query(db).yield_per(EXPORT_BATCH_SIZE)
+    finally:
+        db.close()
+
+
 @router.get("/export/list/{list_id}", tags=["Analytics"])
 def export_list_csv(list_id: int, request: Request, db: Session = Depends(get_db)):
     
@@ -25,32 +56,24 @@ def export_list_csv(list_id: int, request: Request, db: Session = Depends(get_db
     if not vessel_list:
         raise HTTPException(status_code=404, detail="List not found")
 
-    vessels = db.query(models.Vessel).filter(models.Vessel.list_id == list_id).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['MMSI', 'IMO', 'Name', 'Flag', 'LastPosition', 'Note'])
-
-    for vessel in vessels:
-        writer.writerow([
-            vessel.mmsi,
-            vessel.imo or '',
-            vessel.name or '',
-            vessel.flag or '',
-            vessel.lastposition or '',
-            vessel.note or ''
-        ])
-
-    csv_data = output.getvalue()
-    output.close()
-
+    vessel_count = queries.count_list_vessels(db, list_id)
     safe_filename = sanitize_filename(vessel_list.name)
 
     audit_log("EXPORT", "vessel_list", list_id,
-              {"format": "csv", "vessel_count": len(vessels)}, request)
+              {"format": "csv", "vessel_count": vessel_count}, request)
+
+    def build_query(session: Session):
+        return session.query(
+            models.Vessel.mmsi,
+            func.coalesce(models.Vessel.imo, ''),
+            func.coalesce(models.Vessel.name, ''),
+            func.coalesce(models.Vessel.flag, ''),
+            func.coalesce(models.Vessel.lastposition, ''),
+            func.coalesce(models.Vessel.note, '')
+        ).filter(models.Vessel.list_id == list_id).order_by(models.Vessel.id)
 
-    return Response(
-        content=csv_data,
+    return StreamingResponse(
+        stream_csv(['MMSI', 'IMO', 'Name', 'Flag', 'LastPosition', 'Note'], stream_query(build_query)),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename={safe_filename}.csv"
@@ -59,9 +82,12 @@ def export_list_csv(list_id: int, request: Request, db: Session = Depends(get_db
 
 
 @router.get("/stats", tags=["Analytics"])
-def get_stats(db: Session = Depends(get_db)):
-    
+def get_stats(request: Request, db: Session = Depends(get_db)):
     
+    return cached_json_response(request, analytics_cache, ("stats",), lambda: compute_stats(db))
+
+
+def compute_stats(db: Session) -> dict:
     total_lists = db.query(func.count(models.VesselList.id)).scalar()
     total_vessels = db.query(func.count(models.Vessel.id)).scalar()
     
@@ -117,16 +143,26 @@ def advanced_search(
     list_id: Optional[int] = Query(None, description="Filter by list ID"),
     has_imo: Optional[bool] = Query(None, description="Filter vessels with/without IMO"),
     has_position: Optional[bool] = Query(None, description="Filter vessels with/without position"),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    limit: Optional[int] = Query(None, ge=1),
+    paginate: bool = Query(False, description="Return {items, next_cursor} pages"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Vessel).join(models.VesselList)
+    paged = paginate or cursor is not None
+    limit = queries.page_limit(
+        limit, config.search.default_limit, config.search.max_limit
+    )
+
+    query = db.query(models.Vessel).join(models.Vessel.vessel_list).options(
+        contains_eager(models.Vessel.vessel_list)
+    )
     
-    if mmsi:
-        query = query.filter(models.Vessel.mmsi.contains(mmsi))
-    if imo:
-        query = query.filter(models.Vessel.imo.contains(imo))
-    if name:
-        query = query.filter(models.Vessel.name.contains(name))
+    ranking = []
+    for column, term in (("mmsi", mmsi), ("imo", imo), ("name", name)):
+        term = term.strip() if term else None
+        if term:
+            query = query.filter(search_index.contains((column,), term))
+            ranking.append(search_index.relevance((column,), term))
     if flag:
         query = query.filter(models.Vessel.flag == flag)
     if list_id:
@@ -142,9 +178,11 @@ def advanced_search(
         else:
             query = query.filter(models.Vessel.lastposition.is_(None))
     
-    results = query.all()
+    rows, next_cursor = queries.keyset_page(
+        query, (*ranking, *queries.vessel_page_keys()), cursor, limit
+    )
     
-    return [
+    results = [
         {
             "id": vessel.id,
             "mmsi": vessel.mmsi,
@@ -157,41 +195,74 @@ def advanced_search(
             "list_name": vessel.vessel_list.name,
             "list_color": vessel.vessel_list.color
         }
-        for vessel in results
+        for (vessel,) in rows
     ]
+    return queries.page_body(results, next_cursor) if paged else results
 
 
 @router.get("/filters/flags", tags=["Analytics"])
-def get_available_flags(db: Session = Depends(get_db)):
+def get_available_flags(request: Request, db: Session = Depends(get_db)):
     
-    flags = db.query(models.Vessel.flag).filter(
-        models.Vessel.flag.isnot(None)
-    ).distinct().all()
-    return [f[0] for f in flags]
+    def compute():
+        flags = db.query(models.Vessel.flag).filter(
+            models.Vessel.flag.isnot(None)
+        ).distinct().all()
+        return [f[0] for f in flags]
+
+    return cached_json_response(request, analytics_cache, ("flags",), compute)
 
 @router.get("/filters/lists", tags=["Analytics"])
-def get_lists_summary(db: Session = Depends(get_db)):
+def get_lists_summary(request: Request, db: Session = Depends(get_db)):
     
-    lists = db.query(models.VesselList).all()
-    return [
-        {
-            "id": l.id,
-            "name": l.name,
-            "color": l.color,
-            "vessel_count": len(l.vessels)
-        }
-        for l in lists
-    ]
+    def compute():
+        lists = queries.lists_with_counts(db).order_by(models.VesselList.id).all()
+        return [
+            {
+                "id": l.id,
+                "name": l.name,
+                "color": l.color,
+                "vessel_count": vessel_count
+            }
+            for l, vessel_count in lists
+        ]
+
+    return cached_json_response(request, analytics_cache, ("lists",), compute)
 
 
 @router.get("/vessels/aggregated", tags=["Analytics"])
-def get_aggregated_vessels(db: Session = Depends(get_db)):
-    all_vessels = db.query(models.Vessel).join(models.VesselList).all()
-    
+def get_aggregated_vessels(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    limit: Optional[int] = Query(None, ge=1),
+        db: Session = Depends(get_db)
+):
+    limit = queries.page_limit(
+        limit, config.pagination.default_page_size, config.pagination.max_page_size
+    )
+    return cached_json_response(
+        request,
+        analytics_cache,
+        ("aggregated", cursor, limit),
+        lambda: compute_aggregated_vessels(db, cursor, limit)
+    )
+
+
+def compute_aggregated_vessels(db: Session, cursor: Optional[str], limit: int) -> dict:
+    total_unique_vessels = db.query(func.count(distinct(queries.aggregated_key()))).scalar()
+
+    groups, next_cursor = queries.aggregated_key_page(db, cursor, limit)
+    keys = [key for key, _ in groups]
+
     vessel_groups = {}
+    if keys:
+        vessels = db.query(models.Vessel).join(models.Vessel.vessel_list).options(
+            contains_eager(models.Vessel.vessel_list)
+        ).filter(queries.aggregated_key_filter(keys)).order_by(models.Vessel.id).all()
+    else:
+        vessels = []
     
-    for vessel in all_vessels:
-        key = vessel.mmsi if vessel.mmsi else f"imo_{vessel.imo}"
+    for vessel in vessels:
+        key = vessel.mmsi if vessel.mmsi else f"imo_{vessel.imo or ''}"
         
         if key not in vessel_groups:
             vessel_groups[key] = {
@@ -213,42 +284,51 @@ def get_aggregated_vessels(db: Session = Depends(get_db)):
         })
         vessel_groups[key]["list_count"] = len(vessel_groups[key]["lists"])
     
-    result = sorted(vessel_groups.values(), key=lambda x: x["list_count"], reverse=True)
-    
     return {
-        "total_unique_vessels": len(result),
-        "vessels": result
+        "total_unique_vessels": total_unique_vessels,
+        "vessels": [vessel_groups[key] for key in keys if key in vessel_groups],
+        "next_cursor": next_cursor
     }
 
 @router.get("/export/aggregated", tags=["Analytics"])
 def export_aggregated_csv(request: Request, db: Session = Depends(get_db)):
     
-    data = get_aggregated_vessels(db)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['MMSI', 'IMO', 'Name', 'Flag', 'Lists', 'List Count', 'List Names'])
-
-    for vessel in data["vessels"]:
-        list_names = ', '.join([l['list_name'] for l in vessel['lists']])
-        writer.writerow([
-            vessel['mmsi'] or '',
-            vessel['imo'] or '',
-            vessel['name'] or '',
-            vessel['flag'] or '',
-            vessel['list_count'],
-            vessel['list_count'],
-            list_names
-        ])
-
-    csv_data = output.getvalue()
-    output.close()
+    total_unique_vessels = db.query(func.count(distinct(queries.aggregated_key()))).scalar()
 
     audit_log("EXPORT", "aggregated_vessels", None,
-              {"format": "csv", "vessel_count": data["total_unique_vessels"]}, request)
+              {"format": "csv", "vessel_count": total_unique_vessels}, request)
+
+    def build_query(session: Session):
+        key = queries.aggregated_key()
+        groups = session.query(
+            key.label("key"),
+            func.min(models.Vessel.id).label("vessel_id"),
+            func.count(models.Vessel.id).label("list_count"),
+            func.aggregate_strings(models.VesselList.name, ', ').label("list_names")
+        ).join(
+            models.VesselList, models.Vessel.list_id == models.VesselList.id
+        ).group_by(key).subquery()
+
+        # One representative row (the first vessel added) supplies every
+        # identity column, so a row never mixes values from different vessels.
+        vessel = aliased(models.Vessel)
+        return session.query(
+            func.coalesce(vessel.mmsi, ''),
+            func.coalesce(vessel.imo, ''),
+            func.coalesce(vessel.name, ''),
+            func.coalesce(vessel.flag, ''),
+            groups.c.list_count,
+            groups.c.list_count,
+            groups.c.list_names
+        ).join(
+            vessel, vessel.id == groups.c.vessel_id
+        ).order_by(groups.c.list_count.desc(), groups.c.key)
 
-    return Response(
-        content=csv_data,
+    return StreamingResponse(
+        stream_csv(
+            ['MMSI', 'IMO', 'Name', 'Flag', 'Lists', 'List Count', 'List Names'],
+            stream_query(build_query)
+        ),
         media_type="text/csv",
         headers={
             "Content-Disposition": "attachment; filename=aggregated_vessels.csv"
@@ -0,0 +1,107 @@
+"""Concurrent load test for the vessel_lists API.
+
+Runs a mix of the routes that go through database.run_db against a running
+server and prints latency percentiles per route. Compare DATABASE_ASYNC=false
+and DATABASE_ASYNC=true by restarting the server between runs:
+
+    RATE_LIMIT_ENABLED=false DATABASE_ASYNC=false uvicorn main:app --port 8081
+    python benchmarks/load_test.py --url http://localhost:8081 --seed 20000
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+MMSI_BASE = 200000000
+IMO_BASE = 1000000
+
+
+async def seed(client: httpx.AsyncClient, vessels: int) -> int:
+    response = await client.post("/lists/", json={"name": f"Load test {int(time.time())}", "color": "#336699"})
+    response.raise_for_status()
+    list_id = response.json()["id"]
+
+    body = "\n".join(
+        json.dumps({"mmsi": str(MMSI_BASE + i), "imo": str(IMO_BASE + i), "name": f"Vessel {i}"})
+        for i in range(vessels)
+    )
+    response = await client.post(
+        f"/vessels/import?list_id={list_id}",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+        timeout=None,
+    )
+    response.raise_for_status()
+    return list_id
+
+
+def request_mix(list_id: int, vessels: int) -> List[Tuple[str, str, str, dict]]:
+    vessel = random.randrange(max(vessels, 1))
+    return [
+        ("lists", "GET", "/lists/", {}),
+        ("vessels", "GET", f"/vessels/?list_id={list_id}&paginate=true", {}),
+        ("all", "GET", "/vessels/all?paginate=true", {}),
+        ("search", "GET", f"/vessels/search?q={MMSI_BASE + vessel}", {}),
+        ("update", "PUT", f"/vessels/update-by-imo/{IMO_BASE + vessel}", {"json": {"name": f"Vessel {vessel}"}}),
+    ]
+
+
+async def run(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        list_id = await seed(client, args.seed) if args.seed else args.list_id
+        vessels = args.seed or args.vessels
+
+        latencies: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait(random.choice(request_mix(list_id, vessels)))
+
+        async def worker() -> None:
+            while not queue.empty():
+                name, method, path, kwargs = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+                if failed:
+                    errors[name] = errors.get(name, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}: "
+          f"{elapsed:.2f} s, {args.requests / elapsed:.1f} req/s")
+    print(f"{'route':<10}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, values in sorted(latencies.items()):
+        cuts = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+        print(f"{name:<10}{len(values):>7}{errors.get(name, 0):>8}"
+              f"{cuts[49]:>10.1f}{cuts[94]:>10.1f}{cuts[98]:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8081")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0, help="Import this many vessels into a new list first")
+    parser.add_argument("--list-id", type=int, default=1, help="List to read when not seeding")
+    parser.add_argument("--vessels", type=int, default=1000, help="Vessels in the list when not seeding")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
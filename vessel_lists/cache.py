@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+import models
+
+TRACKED_MODELS = (models.Vessel, models.VesselList)
+CONFLICT_COLUMNS = ('mmsi', 'imo', 'list_id')
+
+_ETAG_EPOCH = f"{time.time_ns():x}"
+
+
+class Generation:
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+        self._watchers: List[Callable[[int], None]] = []
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def watch(self, callback: Callable[[int], None]) -> None:
+        self._watchers.append(callback)
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            value = self._value
+
+        for callback in self._watchers:
+            callback(value)
+        return value
+
+
+data_generation = Generation()
+conflict_generation = Generation()
+document_generation = Generation()
+
+
+class GenerationCache:
+
+    def __init__(self, generation: Generation, max_entries: int = 128):
+        self.generation = generation
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[int, Any]:
+        generation = self.generation.value
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = (generation, compute())
+
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = entry
+
+        return entry
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        return self.get_entry(key, compute)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+
+        return {
+            "entries": len(self._entries),
+            "generation": self.generation.value,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _etag(key: Hashable, generation: int) -> str:
+    return f'W/"{_ETAG_EPOCH}-{generation}-{zlib.crc32(repr(key).encode()):08x}"'
+
+
+def cached_json_response(
+    request: Request,
+    cache: GenerationCache,
+    key: Hashable,
+    compute: Callable[[], Any]
+) -> Response:
+    
+    headers = {"Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = _etag(key, cache.generation.value)
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    generation, body = cache.get_entry(
+        key, lambda: json.dumps(jsonable_encoder(compute())).encode()
+    )
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={**headers, "ETag": _etag(key, generation)}
+    )
+
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault("pending_generations", set())
+
+
+def _touches_conflicts(obj) -> bool:
+    if not isinstance(obj, models.Vessel):
+        return True
+
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in CONFLICT_COLUMNS)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    pending = _pending(session)
+
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            pending.update((data_generation, conflict_generation))
+        elif isinstance(obj, models.VesselDocument):
+            pending.add(document_generation)
+
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED_MODELS) and session.is_modified(obj):
+            pending.add(data_generation)
+            if _touches_conflicts(obj):
+                pending.add(conflict_generation)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is models.VesselDocument:
+        _pending(orm_execute_state.session).add(document_generation)
+        return
+
+    if mapper is None or mapper.class_ not in TRACKED_MODELS:
+        return
+
+    pending = _pending(orm_execute_state.session)
+    pending.add(data_generation)
+
+    parameters = orm_execute_state.parameters
+    if (
+        orm_execute_state.is_update
+        and mapper.class_ is models.Vessel
+        and isinstance(parameters, list)
+        and parameters
+        and not any(column in row for row in parameters for column in CONFLICT_COLUMNS)
+    ):
+        return
+
+    pending.add(conflict_generation)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_generations(session):
+    pending = session.info.pop("pending_generations", None)
+    for generation in pending or ():
+        generation.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_generations(session):
+    session.info.pop("pending_generations", None)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import List, Optional, Set
+
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import models, database
+from cache import data_generation
+from config import config
+
+logger = logging.getLogger("change_feed")
+
+router = APIRouter()
+
+CHANGE_TABLE = "change_log"
+VESSEL_COLUMNS = ("mmsi", "imo", "name", "callsign", "flag", "lastposition", "note", "list_id")
+LIST_COLUMNS = ("name", "color", "custom_data")
+TRIGGER_NAMES = tuple(
+    f"{CHANGE_TABLE}_{table}_{suffix}"
+    for table in ("vessels", "vessel_lists")
+    for suffix in ("ai", "au", "ad")
+)
+
+
+def _vessel_json(row: str) -> str:
+    fields = ", ".join(f"'{column}', {row}.{column}" for column in ("id",) + VESSEL_COLUMNS)
+    return f"json_object({fields})"
+
+
+def _list_json(row: str) -> str:
+    return (
+        f"json_object('id', {row}.id, 'name', {row}.name, 'color', {row}.color, "
+        f"'custom_data', CASE WHEN json_valid({row}.custom_data) THEN json({row}.custom_data) END)"
+    )
+
+
+def _log_insert(entity: str, row: str, op: str, data: str) -> str:
+    return (
+        f"INSERT INTO {CHANGE_TABLE}(entity, entity_id, op, data) "
+        f"VALUES ('{entity}', {row}.id, '{op}', {data});"
+    )
+
+
+def _update_trigger(name: str, table: str, entity: str, columns, data: str) -> str:
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+    return f"""CREATE TRIGGER {name} AFTER UPDATE OF {", ".join(columns)} ON {table}
+        WHEN {changed} BEGIN
+        {_log_insert(entity, "new", "update", data)}
+    END"""
+
+
+def _trigger_statements() -> List[str]:
+    vessel_columns = tuple(
+        column for column in VESSEL_COLUMNS
+        if column != "lastposition" or config.changes.include_positions
+    )
+    vessel_delete = "json_object('id', old.id, 'mmsi', old.mmsi, 'imo', old.imo, 'list_id', old.list_id)"
+
+    return [
+        f"""CREATE TRIGGER {CHANGE_TABLE}_vessels_ai AFTER INSERT ON vessels BEGIN
+            {_log_insert("vessel", "new", "insert", _vessel_json("new"))}
+        END""",
+        _update_trigger(f"{CHANGE_TABLE}_vessels_au", "vessels", "vessel", vessel_columns, _vessel_json("new")),
+        f"""CREATE TRIGGER {CHANGE_TABLE}_vessels_ad AFTER DELETE ON vessels BEGIN
+            {_log_insert("vessel", "old", "delete", vessel_delete)}
+        END""",
+        f"""CREATE TRIGGER {CHANGE_TABLE}_vessel_lists_ai AFTER INSERT ON vessel_lists BEGIN
+            {_log_insert("list", "new", "insert", _list_json("new"))}
+        END""",
+        _update_trigger(f"{CHANGE_TABLE}_vessel_lists_au", "vessel_lists", "list", LIST_COLUMNS, _list_json("new")),
+        f"""CREATE TRIGGER {CHANGE_TABLE}_vessel_lists_ad AFTER DELETE ON vessel_lists BEGIN
+            {_log_insert("list", "old", "delete", "json_object('id', old.id, 'name', old.name)")}
+        END""",
+    ]
+
+
+enabled = False
+
+
+def setup(engine: Engine) -> bool:
+    global enabled
+
+    if engine.dialect.name != "sqlite":
+        enabled = False
+        return enabled
+
+    with engine.begin() as conn:
+        for name in TRIGGER_NAMES:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+        if config.changes.enabled:
+            for statement in _trigger_statements():
+                conn.execute(text(statement))
+
+    enabled = config.changes.enabled
+    if enabled:
+        with Session(engine) as db:
+            prune(db)
+    return enabled
+
+
+class ChangeNotifier:
+
+    def __init__(self):
+        self._waiters: Set[asyncio.Future] = set()
+        self._lock = threading.Lock()
+
+    def waiter(self) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._waiters.add(future)
+        return future
+
+    def discard(self, future: asyncio.Future) -> None:
+        with self._lock:
+            self._waiters.discard(future)
+
+    def notify(self, *_) -> None:
+        with self._lock:
+            waiters, self._waiters = self._waiters, set()
+
+        for future in waiters:
+            future.get_loop().call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+notifier = ChangeNotifier()
+data_generation.watch(notifier.notify)
+
+_last_prune = 0.0
+
+
+def prune(db: Session) -> int:
+    global _last_prune
+
+    _last_prune = time.monotonic()
+
+    latest = db.query(func.max(models.ChangeLog.seq)).scalar()
+    if latest is None or latest <= config.changes.max_rows:
+        return 0
+
+    deleted = db.query(models.ChangeLog).filter(
+        models.ChangeLog.seq <= latest - config.changes.max_rows
+    ).delete(synchronize_session=False)
+    db.commit()
+
+    if deleted:
+        logger.info(f"Pruned {deleted} change log entries")
+    return deleted
+
+
+def read_changes(db: Session, since: int, limit: int) -> dict:
+
+    if time.monotonic() - _last_prune > config.changes.prune_interval_seconds:
+        prune(db)
+
+    rows = db.query(models.ChangeLog).filter(
+        models.ChangeLog.seq > since
+    ).order_by(models.ChangeLog.seq).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    oldest, latest = db.query(
+        func.min(models.ChangeLog.seq), func.max(models.ChangeLog.seq)
+    ).one()
+
+    return {
+        "since": since,
+        "next_since": rows[-1].seq if rows else since,
+        "latest": latest or 0,
+        "has_more": has_more,
+        "reset": oldest is not None and (since < oldest - 1 or since > latest),
+        "changes": [
+            {
+                "seq": row.seq,
+                "entity": row.entity,
+                "entity_id": row.entity_id,
+                "op": row.op,
+                "changed_at": row.changed_at.isoformat(),
+                "data": row.data
+            }
+            for row in rows
+        ]
+    }
+
+
+@router.get("", tags=["Changes"])
+async def get_changes(
+    since: int = Query(0, ge=0, description="Last sequence number already applied"),
+    limit: int = Query(config.changes.default_limit, ge=1, le=config.changes.max_limit),
+    wait: float = Query(0, ge=0, le=config.changes.max_wait_seconds, description="Seconds to wait for new changes")
+):
+
+    if not enabled:
+        raise HTTPException(status_code=503, detail="Change feed is not available")
+
+    deadline = time.monotonic() + wait
+
+    while True:
+        waiter: Optional[asyncio.Future] = notifier.waiter() if wait else None
+        try:
+            page = await database.run_db(read_changes, since, limit)
+
+            remaining = deadline - time.monotonic()
+            if page["changes"] or page["reset"] or waiter is None or remaining <= 0:
+                return page
+
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            if waiter is not None:
+                notifier.discard(waiter)
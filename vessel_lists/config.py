@@ -20,6 +20,16 @@ class DatabaseConfig:
         "sqlite:///./data/vessel_lists.db"
     ))
     echo: bool = field(default_factory=lambda: os.getenv("DATABASE_ECHO", "false").lower() == "true")
+    async_enabled: bool = field(default_factory=lambda: os.getenv("DATABASE_ASYNC", "false").lower() == "true")
+    pool_size: int = field(default_factory=lambda: int(os.getenv("DATABASE_POOL_SIZE", "10")))
+    max_overflow: int = field(default_factory=lambda: int(os.getenv("DATABASE_MAX_OVERFLOW", "20")))
+    pool_timeout: float = field(default_factory=lambda: float(os.getenv("DATABASE_POOL_TIMEOUT", "30")))
+    pool_recycle: int = field(default_factory=lambda: int(os.getenv("DATABASE_POOL_RECYCLE", "1800")))
+    pool_pre_ping: bool = field(default_factory=lambda: os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true")
+    sqlite_wal: bool = field(default_factory=lambda: os.getenv("SQLITE_WAL", "true").lower() == "true")
+    sqlite_synchronous: str = field(default_factory=lambda: os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"))
+    sqlite_busy_timeout_ms: int = field(default_factory=lambda: int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")))
+    sqlite_cache_size_kb: int = field(default_factory=lambda: int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")))
 
 
 @dataclass
@@ -57,6 +67,8 @@ class WebSocketConfig:
     reconnect_interval: float = 5.0
     ping_interval: float = 30.0
     ping_timeout: float = 10.0
+    flush_interval: float = field(default_factory=lambda: float(os.getenv("AIS_FLUSH_INTERVAL", "1.0")))
+    max_pending: int = field(default_factory=lambda: int(os.getenv("AIS_MAX_PENDING", "5000")))
 
 
 @dataclass
@@ -64,6 +76,61 @@ class RateLimitConfig:
     
     enabled: bool = field(default_factory=lambda: os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true")
     requests_per_minute: int = field(default_factory=lambda: int(os.getenv("RATE_LIMIT_RPM", "60")))
+    idle_ttl_seconds: float = field(default_factory=lambda: float(os.getenv("RATE_LIMIT_IDLE_TTL", "300")))
+    cleanup_interval_seconds: float = 60.0
+
+
+@dataclass
+class AuditConfig:
+    
+    path: str = field(default_factory=lambda: os.getenv("AUDIT_LOG_PATH", "data/audit.log"))
+    max_bytes: int = field(default_factory=lambda: int(os.getenv("AUDIT_LOG_MAX_BYTES", str(10 * 1024 * 1024))))
+    backup_count: int = field(default_factory=lambda: int(os.getenv("AUDIT_LOG_BACKUPS", "10")))
+    compress: bool = field(default_factory=lambda: os.getenv("AUDIT_LOG_COMPRESS", "true").lower() == "true")
+    queue_size: int = 10000
+
+
+@dataclass
+class ImportConfig:
+    
+    chunk_size: int = field(default_factory=lambda: int(os.getenv("IMPORT_CHUNK_SIZE", "1000")))
+    max_errors: int = field(default_factory=lambda: int(os.getenv("IMPORT_MAX_ERRORS", "1000")))
+
+
+@dataclass
+class ChangesConfig:
+    
+    enabled: bool = field(default_factory=lambda: os.getenv("CHANGES_ENABLED", "true").lower() == "true")
+    include_positions: bool = field(default_factory=lambda: os.getenv("CHANGES_INCLUDE_POSITIONS", "false").lower() == "true")
+    max_rows: int = field(default_factory=lambda: int(os.getenv("CHANGES_MAX_ROWS", "1000000")))
+    prune_interval_seconds: int = 300
+    default_limit: int = 500
+    max_limit: int = 5000
+    max_wait_seconds: int = 60
+
+
+@dataclass
+class PaginationConfig:
+    
+    default_page_size: int = field(default_factory=lambda: int(os.getenv("PAGE_SIZE_DEFAULT", "100")))
+    max_page_size: int = field(default_factory=lambda: int(os.getenv("PAGE_SIZE_MAX", "1000")))
+
+
+@dataclass
+class SearchConfig:
+    
+    fts_enabled: bool = field(default_factory=lambda: os.getenv("SEARCH_FTS_ENABLED", "true").lower() == "true")
+    default_limit: int = field(default_factory=lambda: int(os.getenv("SEARCH_DEFAULT_LIMIT", "50")))
+    max_limit: int = 500
+
+
+@dataclass
+class DocumentConfig:
+    
+    storage: str = field(default_factory=lambda: os.getenv("DOCUMENT_STORAGE", "text").lower())
+    compress_threshold: int = field(default_factory=lambda: int(os.getenv("DOCUMENT_COMPRESS_THRESHOLD", "4096")))
+    compress_level: int = field(default_factory=lambda: int(os.getenv("DOCUMENT_COMPRESS_LEVEL", "6")))
+    indexed_keys: List[str] = field(default_factory=lambda: get_env_list("DOCUMENT_INDEXED_KEYS"))
 
 
 @dataclass
@@ -81,6 +148,12 @@ class AppConfig:
     websocket: WebSocketConfig = field(default_factory=WebSocketConfig)
     rate_limit: RateLimitConfig = field(default_factory=RateLimitConfig)
     security: SecurityConfig = field(default_factory=SecurityConfig)
+    search: SearchConfig = field(default_factory=SearchConfig)
+    pagination: PaginationConfig = field(default_factory=PaginationConfig)
+    audit: AuditConfig = field(default_factory=AuditConfig)
+    documents: DocumentConfig = field(default_factory=DocumentConfig)
+    imports: ImportConfig = field(default_factory=ImportConfig)
+    changes: ChangesConfig = field(default_factory=ChangesConfig)
 
 
 config = AppConfig()
@@ -1,6 +1,9 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 
 from config import config
 
@@ -9,15 +12,102 @@ if not os.path.exists("data"):
 
 SQLALCHEMY_DATABASE_URL = config.database.url
 
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (
+    ":memory:" in SQLALCHEMY_DATABASE_URL or SQLALCHEMY_DATABASE_URL.rstrip("/") in ("sqlite:", "sqlite+pysqlite:")
+)
+
 connect_args = {}
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+if IS_SQLITE:
     connect_args["check_same_thread"] = False
 
+
+def engine_options() -> dict:
+
+    options = {
+        "echo": config.database.echo,
+        "pool_pre_ping": config.database.pool_pre_ping,
+    }
+    if not IS_SQLITE_MEMORY:
+        options.update(
+            pool_size=config.database.pool_size,
+            max_overflow=config.database.max_overflow,
+            pool_timeout=config.database.pool_timeout,
+            pool_recycle=config.database.pool_recycle,
+        )
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+
+    cursor = dbapi_connection.cursor()
+    if config.database.sqlite_wal and not IS_SQLITE_MEMORY:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={config.database.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(config.database.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(config.database.sqlite_cache_size_kb)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def async_database_url(url: str) -> str:
+
+    driver, sep, rest = url.partition("://")
+    if driver in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if driver in ("postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args=connect_args,
-    echo=config.database.echo
+    **engine_options()
 )
+if IS_SQLITE:
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+
+if config.database.async_enabled:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    async_options = engine_options()
+    if IS_SQLITE and not IS_SQLITE_MEMORY:
+        async_options["poolclass"] = AsyncAdaptedQueuePool
+
+    async_engine = create_async_engine(
+        async_database_url(SQLALCHEMY_DATABASE_URL),
+        **async_options
+    )
+    if IS_SQLITE:
+        event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+def _run_with_session(fn: Callable[..., Any], *args) -> Any:
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def run_db(fn: Callable[..., Any], *args) -> Any:
+
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(fn, *args)
+
+    return await run_in_threadpool(_run_with_session, fn, *args)
+
+
 Base = declarative_base()
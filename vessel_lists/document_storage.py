@@ -0,0 +1,95 @@
+import json
+import zlib
+from typing import Any, Dict, Iterator, Tuple
+
+from sqlalchemy import LargeBinary, String
+from sqlalchemy.types import TypeDecorator
+
+from config import config
+
+MAX_INDEXED_LENGTH = 256
+
+_ZLIB_HEADER = b"\x78"
+
+
+def encode_payload(payload: Dict[str, Any], binary: bool = False):
+
+    text = json.dumps(payload, separators=(",", ":"))
+    if config.documents.storage != "compressed":
+        return text.encode() if binary else text
+
+    data = text.encode()
+    if len(data) >= config.documents.compress_threshold:
+        return zlib.compress(data, config.documents.compress_level)
+    return data if binary else text
+
+
+def decode_payload(value) -> Dict[str, Any]:
+
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        return json.loads(value)
+
+    data = bytes(value)
+    if data[:1] == _ZLIB_HEADER:
+        data = zlib.decompress(data)
+    return json.loads(data)
+
+
+def _native_json(dialect) -> bool:
+    return config.documents.storage == "json" and dialect.name == "postgresql"
+
+
+class DocumentPayload(TypeDecorator):
+    
+
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        storage = config.documents.storage
+
+        # JSON result processors fail on compressed blobs, so outside
+        # PostgreSQL json mode stores text and every mode can read every row.
+        # On PostgreSQL, JSONB and BYTEA columns need a migration to switch.
+        if _native_json(dialect):
+            from sqlalchemy.dialects.postgresql import JSONB
+            return dialect.type_descriptor(JSONB())
+
+        if storage == "compressed" and dialect.name != "sqlite":
+            return dialect.type_descriptor(LargeBinary())
+
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or _native_json(dialect):
+            return value
+        return encode_payload(value, binary=dialect.name != "sqlite" and config.documents.storage == "compressed")
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        return decode_payload(value)
+
+
+def indexed_items(payload: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+
+    keys = config.documents.indexed_keys
+    for key, value in payload.items():
+        if keys and key not in keys:
+            continue
+
+        if isinstance(value, bool):
+            text = "true" if value else "false"
+        elif isinstance(value, (str, int, float)):
+            text = str(value)
+        else:
+            continue
+
+        if len(key) <= MAX_INDEXED_LENGTH and len(text) <= MAX_INDEXED_LENGTH:
+            yield key, text
+
+
+def is_indexed_key(key: str) -> bool:
+    return not config.documents.indexed_keys or key in config.documents.indexed_keys
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List
+from sqlalchemy import and_, case, func, literal_column, or_, select
+from datetime import datetime
+from itertools import islice
+from typing import List, Optional, Tuple
 import json
 import csv
 import io
 
-import models, schemas, database
+import models, schemas, database, queries
+from cache import GenerationCache, document_generation
+from config import config
+from document_storage import indexed_items, is_indexed_key
 
 router = APIRouter()
 
@@ -18,12 +23,46 @@ def get_db():
         db.close()
 
 
+def document_keys(json_data: dict) -> List[models.VesselDocumentKey]:
+    return [
+        models.VesselDocumentKey(key=key, value=value)
+        for key, value in indexed_items(json_data)
+    ]
+
+
+def setup_key_index(engine, batch_size: int = 500) -> int:
+
+    indexed_keys = json.dumps(sorted(config.documents.indexed_keys))
+
+    with Session(engine) as db:
+        state = db.get(models.DocumentKeyIndexState, 1)
+        if state is not None and state.indexed_keys == indexed_keys:
+            return 0
+
+        db.query(models.VesselDocumentKey).delete(synchronize_session=False)
+
+        indexed = 0
+        documents = db.query(models.VesselDocument.id, models.VesselDocument.json_data).yield_per(batch_size)
+        for document_id, json_data in documents:
+            db.add_all(
+                models.VesselDocumentKey(document_id=document_id, key=key, value=value)
+                for key, value in indexed_items(json_data)
+            )
+            indexed += 1
+
+        db.merge(models.DocumentKeyIndexState(id=1, indexed_keys=indexed_keys, built_at=datetime.utcnow()))
+        db.commit()
+
+    return indexed
+
+
 @router.post("/", response_model=schemas.VesselDocument, tags=["Documents"])
 def create_document(document: schemas.VesselDocumentCreate, db: Session = Depends(get_db)):
     
     db_document = models.VesselDocument(
         mmsi=document.mmsi,
-        json_data=json.dumps(document.json_data)
+        json_data=document.json_data,
+        keys=document_keys(document.json_data)
     )
     db.add(db_document)
     db.commit()
@@ -33,42 +72,184 @@ def create_document(document: schemas.VesselDocumentCreate, db: Session = Depend
         "id": db_document.id,
         "mmsi": db_document.mmsi,
         "timestamp": db_document.timestamp.isoformat(),
-        "json_data": json.loads(db_document.json_data)
+        "json_data": db_document.json_data
     }
 
+PREVIEW_KEYS = 4
+
+count_cache = GenerationCache(document_generation, max_entries=1024)
+
+
+def count_for_mmsi(db: Session, mmsi: str) -> int:
+    return count_cache.get_or_set(
+        mmsi,
+        lambda: db.query(func.count(models.VesselDocument.id)).filter(
+            models.VesselDocument.mmsi == mmsi
+        ).scalar()
+    )
+
+
+def preview_of(json_data: dict) -> dict:
+    return dict(islice(json_data.items(), PREVIEW_KEYS))
+
+
+def sqlite_preview():
+
+    entries = select(
+        literal_column("key"),
+        literal_column("value"),
+        literal_column("type")
+    ).select_from(
+        func.json_each(models.VesselDocument.json_data)
+    ).limit(PREVIEW_KEYS).subquery()
+
+    value = func.json(case(
+        (entries.c.type == "true", "true"),
+        (entries.c.type == "false", "false"),
+        (entries.c.type == "null", "null"),
+        (entries.c.type == "text", func.json_quote(entries.c.value)),
+        else_=entries.c.value
+    ))
+    return select(
+        func.json_group_object(entries.c.key, value)
+    ).scalar_subquery()
+
+
+def encode_document_cursor(timestamp: datetime, document_id: int) -> str:
+    return queries.encode_cursor([timestamp.isoformat(), document_id])
+
+
+def decode_document_cursor(cursor: str) -> Tuple[datetime, int]:
+    timestamp, document_id = queries.decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(timestamp), int(document_id)
+    except (TypeError, ValueError):
+        raise queries.InvalidCursor(cursor)
+
+
+def document_page(
+    db: Session,
+    filters: list,
+    cursor: Optional[str],
+    limit: int,
+    preview_only: bool,
+    offset: int = 0
+) -> Tuple[List[dict], Optional[str]]:
+
+    doc = models.VesselDocument
+    use_sql_preview = preview_only and db.get_bind().dialect.name == "sqlite"
+
+    if use_sql_preview:
+        is_text = func.typeof(doc.json_data) == "text"
+        columns = (
+            case((is_text, sqlite_preview())).label("preview"),
+            case((~is_text, doc.json_data)).label("json_data"),
+        )
+    else:
+        columns = (literal_column("NULL").label("preview"), doc.json_data)
+
+    query = db.query(doc.id, doc.mmsi, doc.timestamp, *columns).filter(*filters)
+
+    if cursor:
+        timestamp, document_id = decode_document_cursor(cursor)
+        query = query.filter(or_(
+            doc.timestamp < timestamp,
+            and_(doc.timestamp == timestamp, doc.id < document_id)
+        ))
+
+    rows = query.order_by(doc.timestamp.desc(), doc.id.desc()).offset(offset).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_document_cursor(rows[-1].timestamp, rows[-1].id)
+
+    documents = []
+    for document_id, document_mmsi, timestamp, preview, json_data in rows:
+        item = {
+            "id": document_id,
+            "mmsi": document_mmsi,
+            "timestamp": timestamp.isoformat(),
+        }
+        if preview is not None:
+            item["preview"] = json.loads(preview)
+        else:
+            item["preview"] = preview_of(json_data or {})
+            if not preview_only:
+                item["json_data"] = json_data
+        documents.append(item)
+
+    return documents, next_cursor
+
+
 @router.get("/", tags=["Documents"])
 def get_documents(
+    response: Response,
     mmsi: str = Query(..., description="MMSI to filter documents"),
-    page: int = Query(1, ge=1, description="Page number"),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    page: Optional[int] = Query(None, ge=1, description="Page number (offset paging, kept for older clients)"),
     size: int = Query(20, ge=1, le=100, description="Page size"),
+    view: str = Query("full", regex="^(full|preview)$", description="'preview' skips the full JSON payload"),
+    include_total: bool = Query(True, description="Include the (cached) document count"),
     db: Session = Depends(get_db)
 ):
     
-    total = db.query(func.count(models.VesselDocument.id)).filter(
-        models.VesselDocument.mmsi == mmsi
-    ).scalar()
-    
-    documents = db.query(models.VesselDocument).filter(
-        models.VesselDocument.mmsi == mmsi
-    ).order_by(desc(models.VesselDocument.timestamp)).offset(
-        (page - 1) * size
-    ).limit(size).all()
+    paged = page is not None and not cursor
+    offset = (page - 1) * size if paged else 0
+
+    documents, next_cursor = document_page(
+        db, [models.VesselDocument.mmsi == mmsi], cursor, size, view == "preview", offset
+    )
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    total = count_for_mmsi(db, mmsi) if include_total or paged else None
+    result = {
+        "total": total,
+        "size": size,
+        "next_cursor": next_cursor,
+        "documents": documents
+    }
+    if paged:
+        result["page"] = page
+        result["pages"] = (total + size - 1) // size
+    return result
+
+@router.get("/search", tags=["Documents"])
+def search_documents(
+    response: Response,
+    key: str = Query(..., min_length=1, description="Indexed top-level key"),
+    value: str = Query(..., description="Exact value of the key"),
+    mmsi: Optional[str] = Query(None, description="Restrict to one MMSI"),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    size: int = Query(20, ge=1, le=100, description="Page size"),
+    view: str = Query("preview", regex="^(full|preview)$"),
+    db: Session = Depends(get_db)
+):
     
+    if not is_indexed_key(key):
+        raise HTTPException(status_code=400, detail=f"Key '{key}' is not indexed")
+
+    matches = select(models.VesselDocumentKey.document_id).where(
+        models.VesselDocumentKey.key == key,
+        models.VesselDocumentKey.value == value
+    )
+    filters = [models.VesselDocument.id.in_(matches)]
+    if mmsi:
+        filters.append(models.VesselDocument.mmsi == mmsi)
+
+    documents, next_cursor = document_page(db, filters, cursor, size, view == "preview")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
     return {
-        "total": total,
-        "page": page,
+        "key": key,
+        "value": value,
         "size": size,
-        "pages": (total + size - 1) // size,
-        "documents": [
-            {
-                "id": doc.id,
-                "mmsi": doc.mmsi,
-                "timestamp": doc.timestamp.isoformat(),
-                "json_data": json.loads(doc.json_data),
-                "preview": {k: v for k, v in list(json.loads(doc.json_data).items())[:4]}
-            }
-            for doc in documents
-        ]
+        "next_cursor": next_cursor,
+        "documents": documents
     }
 
 @router.get("/{document_id}", response_model=schemas.VesselDocument, tags=["Documents"])
@@ -85,7 +266,7 @@ def get_document(document_id: int, db: Session = Depends(get_db)):
         "id": document.id,
         "mmsi": document.mmsi,
         "timestamp": document.timestamp.isoformat(),
-        "json_data": json.loads(document.json_data)
+        "json_data": document.json_data
     }
 
 @router.put("/{document_id}", response_model=schemas.VesselDocument, tags=["Documents"])
@@ -102,7 +283,8 @@ def update_document(
     if not db_document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    db_document.json_data = json.dumps(document_update.json_data)
+    db_document.json_data = document_update.json_data
+    db_document.keys = document_keys(document_update.json_data)
     db.commit()
     db.refresh(db_document)
     
@@ -110,7 +292,7 @@ def update_document(
         "id": db_document.id,
         "mmsi": db_document.mmsi,
         "timestamp": db_document.timestamp.isoformat(),
-        "json_data": json.loads(db_document.json_data)
+        "json_data": db_document.json_data
     }
 
 @router.delete("/{document_id}", tags=["Documents"])
@@ -132,9 +314,7 @@ def delete_document(document_id: int, db: Session = Depends(get_db)):
 @router.get("/count/{mmsi}", tags=["Documents"])
 def count_documents(mmsi: str, db: Session = Depends(get_db)):
     
-    count = db.query(func.count(models.VesselDocument.id)).filter(
-        models.VesselDocument.mmsi == mmsi
-    ).scalar()
+    count = count_for_mmsi(db, mmsi)
     
     return {"mmsi": mmsi, "count": count}
 
@@ -152,7 +332,7 @@ def export_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    json_data = json.loads(document.json_data)
+    json_data = document.json_data
     
     if format == "json":
         return Response(
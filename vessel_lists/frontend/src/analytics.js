@@ -1,4 +1,5 @@
 import { api } from './api.js';
+import { appendLoadMore } from './pager.js';
 
 export const analytics = {
     async loadStats() {
@@ -48,8 +49,8 @@ export const analytics = {
             };
 
             try {
-                const results = await api.advancedSearch(filters);
-                this.renderSearchResults(results);
+                const page = await api.advancedSearch(filters);
+                this.renderSearchResults(page.items, page.next_cursor, filters);
                 document.getElementById('list-grid').style.display = 'none';
             } catch (error) {
                 alert('Search failed: ' + error.message);
@@ -68,7 +69,7 @@ export const analytics = {
         });
     },
 
-    renderSearchResults(results) {
+    renderSearchResults(results, nextCursor, filters) {
         const container = document.getElementById('search-results');
 
         if (results.length === 0) {
@@ -78,13 +79,17 @@ export const analytics = {
 
         container.innerHTML = `
             <div style="background: var(--card-bg); border: var(--card-border); border-radius: 0.75rem; padding: 1rem; margin-bottom: 1rem;">
-                <strong>${results.length} vessel(s) found</strong>
+                <strong><span class="result-count">0</span> vessel(s) shown</strong>
             </div>
         `;
 
         const resultsDiv = document.createElement('div');
         resultsDiv.className = 'search-results';
+        container.appendChild(resultsDiv);
+        this.appendSearchResults(container, resultsDiv, results, nextCursor, filters);
+    },
 
+    appendSearchResults(container, resultsDiv, results, nextCursor, filters) {
         results.forEach(vessel => {
             const item = document.createElement('div');
             item.className = 'search-result-item';
@@ -105,7 +110,12 @@ export const analytics = {
             resultsDiv.appendChild(item);
         });
 
-        container.appendChild(resultsDiv);
+        container.querySelector('.result-count').textContent = resultsDiv.children.length;
+
+        appendLoadMore(container, nextCursor, async (cursor) => {
+            const page = await api.advancedSearch(filters, cursor);
+            this.appendSearchResults(container, resultsDiv, page.items, page.next_cursor, filters);
+        });
     },
 
     async exportListCSV(listId, listName) {
@@ -157,31 +167,8 @@ export const analytics = {
                 return;
             }
 
-            container.innerHTML = data.vessels.map(vessel => `
-                <div class="aggregated-vessel-item">
-                    <div class="vessel-info-row">
-                        <div>
-                            <strong style="font-size: 1.1rem;">${vessel.mmsi || 'N/A'}</strong>
-                            ${vessel.imo ? `<span style="opacity: 0.7; margin-left: 0.5rem;">IMO: ${vessel.imo}</span>` : ''}
-                        </div>
-                        <div style="display: flex; gap: 1rem; flex-wrap: wrap; align-items: center;">
-                            ${vessel.name ? `<span><strong>Name:</strong> ${vessel.name}</span>` : ''}
-                            ${vessel.flag ? `<span><strong>Flag:</strong> ${vessel.flag}</span>` : ''}
-                        </div>
-                        <div class="list-count-badge">
-                            ${vessel.list_count} ${vessel.list_count === 1 ? 'List' : 'Lists'}
-                        </div>
-                    </div>
-                    <div class="vessel-lists-badges">
-                        ${vessel.lists.map(list => `
-                            <span class="search-result-badge" style="background-color: ${list.list_color}33;">
-                                <span class="list-badge" style="background-color: ${list.list_color}"></span>
-                                ${list.list_name}
-                            </span>
-                        `).join('')}
-                    </div>
-                </div>
-            `).join('');
+            container.innerHTML = '';
+            this.appendAggregatedVessels(container, data);
 
         } catch (error) {
             console.error('Failed to load aggregated vessels:', error);
@@ -189,6 +176,38 @@ export const analytics = {
         }
     },
 
+    appendAggregatedVessels(container, data) {
+        container.insertAdjacentHTML('beforeend', data.vessels.map(vessel => `
+            <div class="aggregated-vessel-item">
+                <div class="vessel-info-row">
+                    <div>
+                        <strong style="font-size: 1.1rem;">${vessel.mmsi || 'N/A'}</strong>
+                        ${vessel.imo ? `<span style="opacity: 0.7; margin-left: 0.5rem;">IMO: ${vessel.imo}</span>` : ''}
+                    </div>
+                    <div style="display: flex; gap: 1rem; flex-wrap: wrap; align-items: center;">
+                        ${vessel.name ? `<span><strong>Name:</strong> ${vessel.name}</span>` : ''}
+                        ${vessel.flag ? `<span><strong>Flag:</strong> ${vessel.flag}</span>` : ''}
+                    </div>
+                    <div class="list-count-badge">
+                        ${vessel.list_count} ${vessel.list_count === 1 ? 'List' : 'Lists'}
+                    </div>
+                </div>
+                <div class="vessel-lists-badges">
+                    ${vessel.lists.map(list => `
+                        <span class="search-result-badge" style="background-color: ${list.list_color}33;">
+                            <span class="list-badge" style="background-color: ${list.list_color}"></span>
+                            ${list.list_name}
+                        </span>
+                    `).join('')}
+                </div>
+            </div>
+        `).join(''));
+
+        appendLoadMore(container, data.next_cursor, async (cursor) => {
+            this.appendAggregatedVessels(container, await api.getAggregatedVessels(cursor));
+        });
+    },
+
     init() {
         this.loadStats();
         this.bindAdvancedSearch();
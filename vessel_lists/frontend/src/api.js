@@ -1,10 +1,21 @@
-
 const API_BASE = ''; // Relative path
 
+async function fetchPage(path, params, cursor, errorMessage) {
+    params.set('paginate', 'true');
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${API_BASE}${path}?${params}`);
+    if (!res.ok) throw new Error(errorMessage);
+    return res.json();
+}
+
 export const api = {
-    getLists: async () => {
-        const res = await fetch(`${API_BASE}/lists/`);
-        if (!res.ok) throw new Error('Failed to fetch lists');
+    getLists: async (cursor = null) => {
+        return fetchPage('/lists/', new URLSearchParams(), cursor, 'Failed to fetch lists');
+    },
+
+    getList: async (id) => {
+        const res = await fetch(`${API_BASE}/lists/${id}`);
+        if (!res.ok) throw new Error('Failed to fetch list');
         return res.json();
     },
 
@@ -34,11 +45,10 @@ export const api = {
         return res.json();
     },
 
-    getVessels: async (listId) => {
-        const url = listId ? `${API_BASE}/vessels/?list_id=${listId}` : `${API_BASE}/vessels/`;
-        const res = await fetch(url);
-        if (!res.ok) throw new Error('Failed to fetch vessels');
-        return res.json();
+    getVessels: async (listId, cursor = null) => {
+        const params = new URLSearchParams();
+        if (listId) params.set('list_id', listId);
+        return fetchPage('/vessels/', params, cursor, 'Failed to fetch vessels');
     },
 
     getConflicts: async () => {
@@ -95,10 +105,8 @@ export const api = {
         return res.json();
     },
 
-    searchVessels: async (query) => {
-        const res = await fetch(`${API_BASE}/vessels/search?q=${encodeURIComponent(query)}`);
-        if (!res.ok) throw new Error('Failed to search vessels');
-        return res.json();
+    searchVessels: async (query, cursor = null) => {
+        return fetchPage('/vessels/search', new URLSearchParams({ q: query }), cursor, 'Failed to search vessels');
     },
 
     deleteVessel: async (id) => {
@@ -126,22 +134,18 @@ export const api = {
         return res.json();
     },
 
-    advancedSearch: async (filters) => {
+    advancedSearch: async (filters, cursor = null) => {
         const params = new URLSearchParams();
         Object.keys(filters).forEach(key => {
             if (filters[key] !== null && filters[key] !== undefined && filters[key] !== '') {
                 params.append(key, filters[key]);
             }
         });
-        const res = await fetch(`${API_BASE}/analytics/vessels/advanced-search?${params}`);
-        if (!res.ok) throw new Error('Failed to search vessels');
-        return res.json();
+        return fetchPage('/analytics/vessels/advanced-search', params, cursor, 'Failed to search vessels');
     },
 
-    getAggregatedVessels: async () => {
-        const res = await fetch(`${API_BASE}/analytics/vessels/aggregated`);
-        if (!res.ok) throw new Error('Failed to fetch aggregated vessels');
-        return res.json();
+    getAggregatedVessels: async (cursor = null) => {
+        return fetchPage('/analytics/vessels/aggregated', new URLSearchParams(), cursor, 'Failed to fetch aggregated vessels');
     },
 
     exportAggregatedCSV: async () => {
@@ -151,8 +155,10 @@ export const api = {
         return blob;
     },
 
-    getDocuments: async (mmsi, page = 1, size = 20) => {
-        const res = await fetch(`${API_BASE}/documents/?mmsi=${encodeURIComponent(mmsi)}&page=${page}&size=${size}`);
+    getDocuments: async (mmsi, cursor = null, size = 20) => {
+        const params = new URLSearchParams({ mmsi, size, view: 'preview' });
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`${API_BASE}/documents/?${params}`);
         if (!res.ok) throw new Error('Failed to fetch documents');
         return res.json();
     },
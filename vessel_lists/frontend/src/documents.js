@@ -4,12 +4,19 @@ export const documents = {
     currentMMSI: null,
     currentPage: 1,
     pageSize: 20,
+    cursors: [null],
 
     async loadDocuments(mmsi, page = 1) {
         try {
-            const data = await api.getDocuments(mmsi, page, this.pageSize);
+            if (mmsi !== this.currentMMSI || page > this.cursors.length) {
+                this.cursors = [null];
+                page = 1;
+            }
+            const data = await api.getDocuments(mmsi, this.cursors[page - 1], this.pageSize);
             this.currentMMSI = mmsi;
             this.currentPage = page;
+            this.cursors.length = page;
+            if (data.next_cursor) this.cursors.push(data.next_cursor);
             this.renderDocuments(data);
         } catch (error) {
             console.error('Failed to load documents:', error);
@@ -57,13 +64,15 @@ export const documents = {
     },
 
     renderPagination(data) {
-        if (data.pages <= 1) return '';
+        const page = this.currentPage;
+        const pages = Math.max(1, Math.ceil(data.total / this.pageSize));
+        if (page === 1 && !data.next_cursor) return '';
 
         return `
             <div class="pagination">
-                <button ${data.page === 1 ? 'disabled' : ''} onclick="documentsModule.loadDocuments('${this.currentMMSI}', ${data.page - 1})">Previous</button>
-                <span>Page ${data.page} of ${data.pages}</span>
-                <button ${data.page === data.pages ? 'disabled' : ''} onclick="documentsModule.loadDocuments('${this.currentMMSI}', ${data.page + 1})">Next</button>
+                <button ${page === 1 ? 'disabled' : ''} onclick="documentsModule.loadDocuments('${this.currentMMSI}', ${page - 1})">Previous</button>
+                <span>Page ${page} of ${pages}</span>
+                <button ${!data.next_cursor ? 'disabled' : ''} onclick="documentsModule.loadDocuments('${this.currentMMSI}', ${page + 1})">Next</button>
             </div>
         `;
     },
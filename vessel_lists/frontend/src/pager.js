@@ -0,0 +1,28 @@
+// Appends a "Load more" button that fetches the page after `cursor`.
+// `loadMore` renders the new rows and calls appendLoadMore again with the next cursor.
+export function appendLoadMore(container, cursor, loadMore) {
+    if (!cursor) return null;
+
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = 'btn btn-secondary load-more-btn';
+    button.style.margin = '1rem auto';
+    button.style.display = 'block';
+    button.textContent = 'Load more';
+
+    button.addEventListener('click', async () => {
+        button.disabled = true;
+        button.textContent = 'Loading...';
+        try {
+            await loadMore(cursor);
+            button.remove();
+        } catch (err) {
+            button.disabled = false;
+            button.textContent = 'Load more';
+            alert(err.message);
+        }
+    });
+
+    container.appendChild(button);
+    return button;
+}
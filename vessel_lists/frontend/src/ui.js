@@ -1,10 +1,12 @@
 import { api } from './api.js';
 import { parseCSV } from './csv_parser.js';
 import { analytics } from './analytics.js';
+import { appendLoadMore } from './pager.js';
 
 export const ui = {
     state: {
         lists: [],
+        listsCursor: null,
         currentList: null,
         conflictedLists: new Set() // Track list IDs with conflicts
     },
@@ -148,8 +150,8 @@ export const ui = {
             if (!query) return;
 
             try {
-                const results = await api.searchVessels(query);
-                this.renderSearchResults(results);
+                const page = await api.searchVessels(query);
+                this.renderSearchResults(page.items, page.next_cursor, query);
                 this.elements.clearSearchBtn.style.display = 'inline-flex';
                 this.elements.grid.style.display = 'none';
             } catch (err) {
@@ -170,7 +172,7 @@ export const ui = {
         });
     },
 
-    renderSearchResults(results) {
+    renderSearchResults(results, nextCursor, query) {
         if (results.length === 0) {
             this.elements.searchResults.innerHTML = '<p style="opacity: 0.7;">No vessels found.</p>';
             return;
@@ -179,7 +181,11 @@ export const ui = {
         this.elements.searchResults.innerHTML = '';
         const container = document.createElement('div');
         container.className = 'search-results';
+        this.appendSearchResults(container, results, nextCursor, query);
+        this.elements.searchResults.appendChild(container);
+    },
 
+    appendSearchResults(container, results, nextCursor, query) {
         results.forEach(vessel => {
             const item = document.createElement('div');
             item.className = 'search-result-item';
@@ -187,7 +193,10 @@ export const ui = {
             container.appendChild(item);
         });
 
-        this.elements.searchResults.appendChild(container);
+        appendLoadMore(container, nextCursor, async (cursor) => {
+            const page = await api.searchVessels(query, cursor);
+            this.appendSearchResults(container, page.items, page.next_cursor, query);
+        });
     },
 
     renderSearchResultItem(item, vessel) {
@@ -229,7 +238,7 @@ export const ui = {
         });
 
         item.querySelector('.view-list-btn').addEventListener('click', async () => {
-            const list = this.state.lists.find(l => l.id === vessel.list_id);
+            const list = await this.findList(vessel.list_id);
             if (list) {
                 this.state.currentList = list;
                 this.openListModal(list);
@@ -570,7 +579,7 @@ export const ui = {
             btn.addEventListener('click', async () => {
                 const vesselId = parseInt(btn.dataset.vesselId);
                 const vessel = vessels.find(v => v.id === vesselId);
-                const list = this.state.lists.find(l => l.id === vessel.list_id);
+                const list = await this.findList(vessel.list_id);
                 if (list) {
                     this.state.currentList = list;
                     this.elements.conflictsModal.classList.remove('open');
@@ -584,13 +593,34 @@ export const ui = {
 
     async loadLists() {
         try {
-            this.state.lists = await api.getLists();
+            const page = await api.getLists();
+            this.state.lists = page.items;
+            this.state.listsCursor = page.next_cursor;
             this.render();
         } catch (err) {
             console.error(err);
         }
     },
 
+    // Lists past the loaded pages are fetched on demand.
+    async findList(listId) {
+        const list = this.state.lists.find(l => l.id === listId);
+        if (list) return list;
+        try {
+            return await api.getList(listId);
+        } catch (err) {
+            console.error(err);
+            return null;
+        }
+    },
+
+    async loadMoreLists(cursor) {
+        const page = await api.getLists(cursor);
+        this.state.lists.push(...page.items);
+        this.state.listsCursor = page.next_cursor;
+        this.render();
+    },
+
     render() {
         this.elements.grid.innerHTML = '';
         this.state.lists.forEach(list => {
@@ -685,6 +715,9 @@ export const ui = {
             renderCardContent();
             this.elements.grid.appendChild(card);
         });
+
+        const loadMoreBtn = appendLoadMore(this.elements.grid, this.state.listsCursor, (cursor) => this.loadMoreLists(cursor));
+        if (loadMoreBtn) loadMoreBtn.style.gridColumn = '1 / -1';
     },
 
     openCreateModal() {
@@ -706,10 +739,10 @@ export const ui = {
 
     async loadListDetails(listId) {
         try {
-            const vessels = await api.getVessels(listId);
+            const page = await api.getVessels(listId);
             this.elements.listDetails.innerHTML = '';
 
-            if (vessels.length === 0) {
+            if (page.items.length === 0) {
                 this.elements.listDetails.innerHTML = '<p style="opacity: 0.5; text-align: center; padding: 1rem;">No vessels in list</p>';
                 return;
             }
@@ -731,18 +764,25 @@ export const ui = {
                 <tbody></tbody>
             `;
             const tbody = table.querySelector('tbody');
-
-            vessels.forEach(v => {
-                const tr = document.createElement('tr');
-                this.renderVesselRow(tr, v, listId);
-                tbody.appendChild(tr);
-            });
             this.elements.listDetails.appendChild(table);
+            this.appendVesselRows(tbody, page, listId);
         } catch (err) {
             this.elements.listDetails.innerHTML = 'Error loading vessels';
         }
     },
 
+    appendVesselRows(tbody, page, listId) {
+        page.items.forEach(v => {
+            const tr = document.createElement('tr');
+            this.renderVesselRow(tr, v, listId);
+            tbody.appendChild(tr);
+        });
+
+        appendLoadMore(this.elements.listDetails, page.next_cursor, async (cursor) => {
+            this.appendVesselRows(tbody, await api.getVessels(listId, cursor), listId);
+        });
+    },
+
     renderVesselRow(tr, v, listId) {
         let positionHtml = '-';
         if (v.lastposition) {
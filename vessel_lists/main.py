@@ -3,17 +3,20 @@ import logging
 from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from models import Base
-import models, schemas, database
+import models, schemas, database, queries, search_index, change_feed
+from cache import GenerationCache, conflict_generation
 from config import config
 from security import (
     SecurityHeadersMiddleware,
     rate_limiter,
     audit_log,
-    get_client_ip
+    get_client_ip,
+    stop_audit_logging
 )
 
 logging.basicConfig(
@@ -23,8 +26,18 @@ logging.basicConfig(
 logger = logging.getLogger("vessel_lists")
 
 models.Base.metadata.create_all(bind=database.engine)
+for model in (models.Vessel, models.VesselDocument):
+    for index in model.__table__.indexes:
+        index.create(bind=database.engine, checkfirst=True)
+search_index.setup(database.engine)
+change_feed.setup(database.engine)
+
+conflicts_cache = GenerationCache(conflict_generation)
 
 from ais_websocket import ais_client
+from documents import router as documents_router, setup_key_index
+
+setup_key_index(database.engine)
 
 
 @asynccontextmanager
@@ -35,6 +48,9 @@ async def lifespan(app: FastAPI):
     yield
     logger.info("Shutting down AIS WebSocket client...")
     await ais_client.stop()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+    stop_audit_logging()
 
 
 tags_metadata = [
@@ -43,6 +59,7 @@ tags_metadata = [
     {"name": "Analytics", "description": "Statistics and export operations"},
     {"name": "Conflicts", "description": "Detect data conflicts"},
     {"name": "AIS", "description": "AIS WebSocket connection and live updates"},
+    {"name": "Changes", "description": "Sequenced feed of list and vessel changes"},
 ]
 
 app = FastAPI(
@@ -79,6 +96,12 @@ async def rate_limit_middleware(request: Request, call_next):
     return await call_next(request)
 
 
+@app.exception_handler(queries.InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: queries.InvalidCursor):
+    
+    return JSONResponse(status_code=400, content={"detail": "Invalid cursor"})
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     
@@ -119,8 +142,8 @@ from fastapi.responses import RedirectResponse
 async def root():
     return RedirectResponse(url="/ui")
 
-def with_vessel_count(vessel_list):
-    vessel_list.vessel_count = len(vessel_list.vessels)
+def with_vessel_count(vessel_list, db: Session):
+    vessel_list.vessel_count = queries.count_list_vessels(db, vessel_list.id)
     return vessel_list
 
 def get_db():
@@ -133,9 +156,13 @@ def get_db():
 from analytics import router as analytics_router
 app.include_router(analytics_router, prefix="/analytics")
 
-from documents import router as documents_router
 app.include_router(documents_router, prefix="/documents")
 
+from vessel_import import router as vessel_import_router
+app.include_router(vessel_import_router, prefix="/vessels")
+
+app.include_router(change_feed.router, prefix="/changes")
+
 from ais_router import router as ais_router
 app.include_router(ais_router, prefix="/ais")
 
@@ -150,21 +177,40 @@ def create_list(vessel_list: schemas.VesselListCreate, db: Session = Depends(get
     db.add(db_list)
     db.commit()
     db.refresh(db_list)
-    return with_vessel_count(db_list)
+    return with_vessel_count(db_list, db)
+
+@app.get("/lists/", response_model=Union[List[schemas.VesselList], schemas.VesselListPage])
+async def read_lists(
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    paginate: bool = Query(False, description="Return {items, next_cursor} pages")
+):
+    paged = paginate or cursor is not None
+    limit = queries.page_limit(
+        limit, config.pagination.default_page_size, config.pagination.max_page_size
+    )
 
-@app.get("/lists/", response_model=List[schemas.VesselList])
-def read_lists(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    lists = db.query(models.VesselList).offset(skip).limit(limit).all()
-    for l in lists:
-        l.vessel_count = len(l.vessels)
-    return lists
+    def load(db: Session):
+        query = queries.lists_with_counts(db)
+        if paged:
+            return queries.keyset_page(query, (models.VesselList.id,), cursor, limit)
+        return query.order_by(models.VesselList.id).offset(skip).limit(limit).all(), None
+
+    rows, next_cursor = await database.run_db(load)
+
+    lists = []
+    for l, vessel_count in rows:
+        l.vessel_count = vessel_count
+        lists.append(l)
+    return queries.page_body(lists, next_cursor) if paged else lists
 
 @app.get("/lists/{list_id}", response_model=schemas.VesselList)
 def read_list(list_id: int, db: Session = Depends(get_db)):
     vessel_list = db.query(models.VesselList).filter(models.VesselList.id == list_id).first()
     if vessel_list is None:
         raise HTTPException(status_code=404, detail="List not found")
-    return vessel_list
+    return with_vessel_count(vessel_list, db)
 
 @app.delete("/lists/{list_id}")
 def delete_list(list_id: int, db: Session = Depends(get_db)):
@@ -190,148 +236,76 @@ def update_list(list_id: int, list_update: schemas.VesselListUpdate, db: Session
 
     db.commit()
     db.refresh(db_list)
-    return with_vessel_count(db_list)
+    return with_vessel_count(db_list, db)
 
 
 
 
 @app.get("/vessels/conflicts")
-def detect_conflicts(db: Session = Depends(get_db)):
-    
-    vessels = db.query(models.Vessel).join(models.VesselList).all()
-    
-    mmsi_map = {}
-    imo_map = {}
-    mmsi_imo_pairs = {}
-    
-    for vessel in vessels:
-        list_info = {
-            "list_id": vessel.list_id,
-            "list_name": vessel.vessel_list.name,
-            "list_color": vessel.vessel_list.color
-        }
-        vessel_info = (vessel, list_info)
-        
-        if vessel.mmsi:
-            if vessel.mmsi not in mmsi_map:
-                mmsi_map[vessel.mmsi] = []
-            mmsi_map[vessel.mmsi].append(vessel_info)
-            
-            if vessel.mmsi not in mmsi_imo_pairs:
-                mmsi_imo_pairs[vessel.mmsi] = {}
-            imo_val = vessel.imo or "NULL"
-            if imo_val not in mmsi_imo_pairs[vessel.mmsi]:
-                mmsi_imo_pairs[vessel.mmsi][imo_val] = []
-            mmsi_imo_pairs[vessel.mmsi][imo_val].append(vessel_info)
-        
-        if vessel.imo:
-            if vessel.imo not in imo_map:
-                imo_map[vessel.imo] = []
-            imo_map[vessel.imo].append(vessel_info)
-    
-    conflicts = {
-        "mmsi_duplicates": [],
-        "imo_duplicates": [],
-        "mmsi_imo_inconsistencies": []
-    }
-    
-    for mmsi, occurrences in mmsi_map.items():
-        unique_lists = set(occ[1]["list_id"] for occ in occurrences)
-        if len(unique_lists) > 1:
-            conflicts["mmsi_duplicates"].append({
-                "mmsi": mmsi,
-                "count": len(occurrences),
-                "lists": [occ[1] for occ in occurrences],
-                "vessels": [{
-                    "id": occ[0].id,
-                    "mmsi": occ[0].mmsi,
-                    "imo": occ[0].imo,
-                    "list_id": occ[1]["list_id"],
-                    "list_name": occ[1]["list_name"],
-                    "list_color": occ[1]["list_color"]
-                } for occ in occurrences]
-            })
-    
-    for imo, occurrences in imo_map.items():
-        unique_lists = set(occ[1]["list_id"] for occ in occurrences)
-        if len(unique_lists) > 1:
-            conflicts["imo_duplicates"].append({
-                "imo": imo,
-                "count": len(occurrences),
-                "lists": [occ[1] for occ in occurrences],
-                "vessels": [{
-                    "id": occ[0].id,
-                    "mmsi": occ[0].mmsi,
-                    "imo": occ[0].imo,
-                    "list_id": occ[1]["list_id"],
-                    "list_name": occ[1]["list_name"],
-                    "list_color": occ[1]["list_color"]
-                } for occ in occurrences]
-            })
-    
-    for mmsi, imo_groups in mmsi_imo_pairs.items():
-        if len(imo_groups) > 1:
-            conflicts["mmsi_imo_inconsistencies"].append({
-                "type": "mmsi_multiple_imos",
-                "mmsi": mmsi,
-                "imos": list(imo_groups.keys()),
-                "vessels": [{
-                    "id": occ[0].id,
-                    "mmsi": occ[0].mmsi,
-                    "imo": occ[0].imo,
-                    "list_id": occ[1]["list_id"],
-                    "list_name": occ[1]["list_name"],
-                    "list_color": occ[1]["list_color"]
-                } for imo_val, occs in imo_groups.items() for occ in occs]
-            })
-    
-    total = (len(conflicts["mmsi_duplicates"]) + 
-             len(conflicts["imo_duplicates"]) + 
-             len(conflicts["mmsi_imo_inconsistencies"]))
+def detect_conflicts(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Conflicts per category"),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
     
-    return {
-        "total_conflicts": total,
-        "conflicts": conflicts
-    }
+    return conflicts_cache.get_or_set(
+        ("conflicts", limit, offset),
+        lambda: queries.detect_conflicts(db, limit, offset)
+    )
 
 @app.get("/vessels/all")
-def get_all_vessels(db: Session = Depends(get_db)):
-    
-    vessels = db.query(models.Vessel).join(models.VesselList).all()
+async def get_all_vessels(
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    limit: Optional[int] = Query(None, ge=1),
+    paginate: bool = Query(False, description="Return {items, next_cursor} pages")
+):
     
-    formatted_results = []
-    for vessel in vessels:
-        formatted_results.append({
-            "id": vessel.id,
-            "mmsi": vessel.mmsi,
-            "imo": vessel.imo,
-            "list_id": vessel.list_id,
-            "list_name": vessel.vessel_list.name,
-            "list_color": vessel.vessel_list.color
-        })
+    paged = paginate or cursor is not None
+    limit = queries.page_limit(
+        limit, config.pagination.default_page_size, config.pagination.max_page_size
+    )
+
+    def load(db: Session):
+        return queries.keyset_page(
+            queries.vessel_summaries(db), queries.vessel_page_keys(), cursor, limit
+        )
+
+    vessels, next_cursor = await database.run_db(load)
     
-    return formatted_results
+    results = [queries.summary_dict(vessel) for vessel in vessels]
+    return queries.page_body(results, next_cursor) if paged else results
 
 @app.get("/vessels/search")
-def search_vessels(q: str = Query(..., min_length=1, description="Search query for MMSI or IMO"), db: Session = Depends(get_db)):
+async def search_vessels(
+    q: str = Query(..., min_length=1, description="Search query for MMSI or IMO"),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    limit: Optional[int] = Query(None, ge=1),
+    paginate: bool = Query(False, description="Return {items, next_cursor} pages")
+):
     
-    query = db.query(models.Vessel).join(models.VesselList).filter(
-        (models.Vessel.mmsi.contains(q)) | (models.Vessel.imo.contains(q))
+    paged = paginate or cursor is not None
+    limit = queries.page_limit(
+        limit, config.search.default_limit, config.search.max_limit
     )
-    results = query.all()
-    
-    formatted_results = []
-    for vessel in results:
-        formatted_results.append({
-            "id": vessel.id,
-            "mmsi": vessel.mmsi,
-            "imo": vessel.imo,
-            "list_id": vessel.list_id,
-            "list_name": vessel.vessel_list.name,
-            "list_color": vessel.vessel_list.color
-        })
+
+    q = q.strip()
+    if not q:
+        return queries.page_body([], None) if paged else []
+
+    columns = ("mmsi", "imo")
+
+    def load(db: Session):
+        return queries.keyset_page(
+            queries.vessel_summaries(db).filter(search_index.contains(columns, q)),
+            (search_index.relevance(columns, q), *queries.vessel_page_keys()),
+            cursor,
+            limit
+        )
+
+    results, next_cursor = await database.run_db(load)
     
-    return formatted_results
+    results = [queries.summary_dict(vessel) for vessel in results]
+    return queries.page_body(results, next_cursor) if paged else results
 
 @app.post("/vessels/", response_model=schemas.Vessel)
 def create_vessel(vessel: schemas.VesselCreate, db: Session = Depends(get_db)):
@@ -357,10 +331,14 @@ def create_vessel(vessel: schemas.VesselCreate, db: Session = Depends(get_db)):
 @app.post("/vessels/bulk")
 def create_vessel_bulk(bulk_data: schemas.VesselBulkCreate, db: Session = Depends(get_db)):
     
-    created_vessels = []
+    lists = {
+        db_list.id: db_list
+        for db_list in db.query(models.VesselList).filter(models.VesselList.id.in_(bulk_data.list_ids))
+    }
 
+    db_vessels = []
     for list_id in bulk_data.list_ids:
-        db_list = db.query(models.VesselList).filter(models.VesselList.id == list_id).first()
+        db_list = lists.get(list_id)
         if not db_list:
             continue
 
@@ -375,26 +353,41 @@ def create_vessel_bulk(bulk_data: schemas.VesselBulkCreate, db: Session = Depend
             list_id=list_id
         )
         db.add(db_vessel)
-        created_vessels.append({
-            "id": db_vessel.id,
-            "list_name": db_list.name,
-            "list_id": list_id
-        })
+        db_vessels.append((db_vessel, db_list))
+
+    db.flush()
+    created_vessels = [
+        {"id": db_vessel.id, "list_name": db_list.name, "list_id": db_list.id}
+        for db_vessel, db_list in db_vessels
+    ]
 
     db.commit()
     return {"created": len(created_vessels), "vessels": created_vessels}
 
-@app.get("/vessels/", response_model=List[schemas.Vessel])
-def read_vessels(
+@app.get("/vessels/", response_model=Union[List[schemas.Vessel], schemas.VesselPage])
+async def read_vessels(
     list_id: Optional[int] = Query(None, description="Filter by list ID"),
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor"),
+    paginate: bool = Query(False, description="Return {items, next_cursor} pages")
 ):
-    query = db.query(models.Vessel)
-    if list_id:
-        query = query.filter(models.Vessel.list_id == list_id)
-    return query.offset(skip).limit(limit).all()
+    paged = paginate or cursor is not None
+    limit = queries.page_limit(
+        limit, config.pagination.default_page_size, config.pagination.max_page_size
+    )
+
+    def load(db: Session):
+        query = db.query(models.Vessel)
+        if list_id:
+            query = query.filter(models.Vessel.list_id == list_id)
+        if paged:
+            return queries.keyset_page(query, queries.vessel_page_keys(), cursor, limit)
+        return [(vessel,) for vessel in query.order_by(models.Vessel.id).offset(skip).limit(limit)], None
+
+    vessels, next_cursor = await database.run_db(load)
+    vessels = [vessel for (vessel,) in vessels]
+    return queries.page_body(vessels, next_cursor) if paged else vessels
 
 @app.get("/vessels/{vessel_id}", response_model=schemas.Vessel)
 def read_vessel(vessel_id: int, db: Session = Depends(get_db)):
@@ -437,8 +430,21 @@ def update_vessel(vessel_id: int, vessel_update: schemas.VesselUpdate, db: Sessi
     db.refresh(db_vessel)
     return db_vessel
 
-@app.put("/vessels/update-by-imo/{imo}")
-def update_vessel_by_imo(imo: str, vessel_update: schemas.VesselUpdate, db: Session = Depends(get_db)):
+IMO_UPDATE_FIELDS = ('mmsi', 'name', 'callsign', 'flag', 'lastposition', 'note')
+
+
+def imo_update_changes(current, fields: dict) -> dict:
+    changes = {}
+    for field in IMO_UPDATE_FIELDS:
+        value = fields.get(field)
+        if value is None:
+            continue
+        if field == 'lastposition' or getattr(current, field) != value:
+            changes[field] = value
+    return changes
+
+
+def apply_imo_update(db: Session, imo: str, fields: dict) -> dict:
     vessels = db.query(models.Vessel).filter(models.Vessel.imo == imo).all()
 
     if not vessels:
@@ -446,28 +452,11 @@ def update_vessel_by_imo(imo: str, vessel_update: schemas.VesselUpdate, db: Sess
 
     updated_count = 0
     for db_vessel in vessels:
-        changed = False
-
-        if vessel_update.mmsi is not None and db_vessel.mmsi != vessel_update.mmsi:
-            db_vessel.mmsi = vessel_update.mmsi
-            changed = True
-        if vessel_update.name is not None and db_vessel.name != vessel_update.name:
-            db_vessel.name = vessel_update.name
-            changed = True
-        if vessel_update.callsign is not None and db_vessel.callsign != vessel_update.callsign:
-            db_vessel.callsign = vessel_update.callsign
-            changed = True
-        if vessel_update.flag is not None and db_vessel.flag != vessel_update.flag:
-            db_vessel.flag = vessel_update.flag
-            changed = True
-        if vessel_update.lastposition is not None:
-            db_vessel.lastposition = vessel_update.lastposition
-            changed = True
-        if vessel_update.note is not None and db_vessel.note != vessel_update.note:
-            db_vessel.note = vessel_update.note
-            changed = True
-
-        if changed:
+        changes = imo_update_changes(db_vessel, fields)
+        for field, value in changes.items():
+            setattr(db_vessel, field, value)
+
+        if changes:
             updated_count += 1
 
     db.commit()
@@ -478,6 +467,49 @@ def update_vessel_by_imo(imo: str, vessel_update: schemas.VesselUpdate, db: Sess
         "updated": updated_count
     }
 
+def apply_imo_updates_bulk(db: Session, updates: dict) -> dict:
+    rows = db.query(
+        models.Vessel.id,
+        models.Vessel.imo,
+        *[getattr(models.Vessel, field) for field in IMO_UPDATE_FIELDS]
+    ).filter(models.Vessel.imo.in_(list(updates))).all()
+
+    results = {imo: {"imo": imo, "found": 0, "updated": 0} for imo in updates}
+    mappings = []
+
+    for row in rows:
+        result = results[row.imo]
+        result["found"] += 1
+
+        changes = imo_update_changes(row, updates[row.imo])
+        if changes:
+            mappings.append({"id": row.id, **changes})
+            result["updated"] += 1
+
+    if mappings:
+        db.execute(update(models.Vessel), mappings)
+    db.commit()
+
+    return {
+        "found": len(rows),
+        "updated": len(mappings),
+        "results": list(results.values())
+    }
+
+@app.put("/vessels/update-by-imo/{imo}")
+async def update_vessel_by_imo(imo: str, vessel_update: schemas.VesselUpdate):
+    return await database.run_db(
+        apply_imo_update, imo, vessel_update.model_dump(exclude_none=True)
+    )
+
+@app.post("/vessels/update-by-imo/bulk")
+async def update_vessels_by_imo_bulk(bulk_update: schemas.VesselImoBulkUpdate):
+    
+    updates = {}
+    for entry in bulk_update.updates:
+        updates.setdefault(entry.imo, {}).update(entry.fields.model_dump(exclude_none=True))
+
+    return await database.run_db(apply_imo_updates_bulk, updates)
 
 if __name__ == "__main__":
     import uvicorn
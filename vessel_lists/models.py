@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
+from document_storage import DocumentPayload
 
 class VesselList(Base):
     __tablename__ = "vessel_lists"
@@ -28,13 +29,60 @@ class Vessel(Base):
 
     vessel_list = relationship("VesselList", back_populates="vessels")
 
+    __table_args__ = (
+        Index("ix_vessels_mmsi_list_id", "mmsi", "list_id"),
+        Index("ix_vessels_imo_list_id", "imo", "list_id"),
+        Index("ix_vessels_mmsi_imo", "mmsi", "imo"),
+        Index("ix_vessels_list_id_id", "list_id", "id"),
+    )
+
 class VesselDocument(Base):
     __tablename__ = "vessel_documents"
 
     id = Column(Integer, primary_key=True, index=True)
     mmsi = Column(String, index=True, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
-    json_data = Column(String, nullable=False)
+    json_data = Column(DocumentPayload, nullable=False)
+
+    keys = relationship("VesselDocumentKey", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_vessel_documents_mmsi_timestamp_id", "mmsi", "timestamp", "id"),
+    )
 
     def __repr__(self):
         return f"<VesselDocument(mmsi={self.mmsi}, timestamp={self.timestamp})>"
+
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)
+    changed_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    data = Column(JSON, nullable=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+class VesselDocumentKey(Base):
+    __tablename__ = "vessel_document_keys"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("vessel_documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    key = Column(String, nullable=False)
+    value = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_vessel_document_keys_key_value", "key", "value", "document_id"),
+    )
+
+
+class DocumentKeyIndexState(Base):
+    __tablename__ = "vessel_document_key_state"
+
+    id = Column(Integer, primary_key=True)
+    indexed_keys = Column(String, nullable=False)
+    built_at = Column(DateTime, default=datetime.utcnow, nullable=False)
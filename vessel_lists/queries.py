@@ -0,0 +1,254 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, distinct, func, or_, tuple_
+from sqlalchemy.orm import Session
+
+import models
+
+
+VESSEL_SUMMARY_COLUMNS = (
+    models.Vessel.id,
+    models.Vessel.mmsi,
+    models.Vessel.imo,
+    models.Vessel.list_id,
+    models.VesselList.name.label("list_name"),
+    models.VesselList.color.label("list_color"),
+)
+VESSEL_SUMMARY_FIELDS = tuple(column.key for column in VESSEL_SUMMARY_COLUMNS)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def page_limit(limit: Optional[int], default: int, maximum: int) -> int:
+
+    return min(limit or default, maximum)
+
+
+def page_body(items: list, next_cursor: Optional[str]) -> dict:
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def keyset_page(query, sort_keys: Sequence, cursor: Optional[str], limit: int) -> Tuple[List[tuple], Optional[str]]:
+
+    size = len(sort_keys)
+    if cursor:
+        query = query.filter(tuple_(*sort_keys) > tuple_(*decode_cursor(cursor, size)))
+
+    rows = query.add_columns(
+        *[key.label(f"sort_key_{i}") for i, key in enumerate(sort_keys)]
+    ).order_by(*sort_keys).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-size:])
+
+    return [tuple(row[:-size]) for row in rows], next_cursor
+
+
+def vessel_page_keys() -> Tuple:
+    return (models.Vessel.list_id, models.Vessel.id)
+
+
+def summary_dict(values: Sequence[Any]) -> dict:
+    return dict(zip(VESSEL_SUMMARY_FIELDS, values))
+
+
+def vessel_counts_subquery(db: Session):
+    return db.query(
+        models.Vessel.list_id,
+        func.count(models.Vessel.id).label("vessel_count")
+    ).group_by(models.Vessel.list_id).subquery()
+
+
+def lists_with_counts(db: Session):
+
+    counts = vessel_counts_subquery(db)
+    return db.query(
+        models.VesselList,
+        func.coalesce(counts.c.vessel_count, 0)
+    ).outerjoin(counts, counts.c.list_id == models.VesselList.id)
+
+
+def count_list_vessels(db: Session, list_id: int) -> int:
+    return db.query(func.count(models.Vessel.id)).filter(
+        models.Vessel.list_id == list_id
+    ).scalar()
+
+
+def vessel_summaries(db: Session):
+
+    return db.query(*VESSEL_SUMMARY_COLUMNS).join(
+        models.VesselList, models.Vessel.list_id == models.VesselList.id
+    )
+
+
+def _present(column):
+    return and_(column.isnot(None), column != "")
+
+
+def _conflict_keys(
+    db: Session,
+    key_column,
+    distinct_expr,
+    limit: Optional[int],
+    offset: int
+) -> Tuple[List[str], int]:
+    groups = db.query(key_column).filter(_present(key_column)).group_by(
+        key_column
+    ).having(func.count(distinct(distinct_expr)) > 1)
+
+    total = db.query(func.count()).select_from(groups.subquery()).scalar()
+
+    groups = groups.order_by(key_column).offset(offset)
+    if limit:
+        groups = groups.limit(limit)
+
+    return [key for (key,) in groups.all()], total
+
+
+def _vessels_by_key(db: Session, key_column, keys: List[str]) -> Dict[str, list]:
+    by_key: Dict[str, list] = {}
+    if not keys:
+        return by_key
+
+    rows = vessel_summaries(db).filter(key_column.in_(keys)).order_by(models.Vessel.id)
+    for row in rows:
+        by_key.setdefault(getattr(row, key_column.key), []).append(row)
+    return by_key
+
+
+def _list_info(row) -> dict:
+    return {
+        "list_id": row.list_id,
+        "list_name": row.list_name,
+        "list_color": row.list_color
+    }
+
+
+def _duplicates(db: Session, key_column, limit: Optional[int], offset: int) -> Tuple[List[dict], int]:
+    keys, total = _conflict_keys(db, key_column, models.Vessel.list_id, limit, offset)
+    by_key = _vessels_by_key(db, key_column, keys)
+
+    duplicates = []
+    for key in keys:
+        rows = by_key.get(key, [])
+        duplicates.append({
+            key_column.key: key,
+            "count": len(rows),
+            "lists": [_list_info(row) for row in rows],
+            "vessels": [row._asdict() for row in rows]
+        })
+    return duplicates, total
+
+
+def _mmsi_imo_inconsistencies(db: Session, limit: Optional[int], offset: int) -> Tuple[List[dict], int]:
+    imo_value = func.coalesce(func.nullif(models.Vessel.imo, ""), "NULL")
+    keys, total = _conflict_keys(db, models.Vessel.mmsi, imo_value, limit, offset)
+    by_key = _vessels_by_key(db, models.Vessel.mmsi, keys)
+
+    inconsistencies = []
+    for mmsi in keys:
+        imo_groups: Dict[str, list] = {}
+        for row in by_key.get(mmsi, []):
+            imo_groups.setdefault(row.imo or "NULL", []).append(row)
+
+        inconsistencies.append({
+            "type": "mmsi_multiple_imos",
+            "mmsi": mmsi,
+            "imos": list(imo_groups.keys()),
+            "vessels": [row._asdict() for rows in imo_groups.values() for row in rows]
+        })
+    return inconsistencies, total
+
+
+def detect_conflicts(db: Session, limit: Optional[int] = None, offset: int = 0) -> dict:
+
+    mmsi_duplicates, mmsi_total = _duplicates(db, models.Vessel.mmsi, limit, offset)
+    imo_duplicates, imo_total = _duplicates(db, models.Vessel.imo, limit, offset)
+    inconsistencies, inconsistency_total = _mmsi_imo_inconsistencies(db, limit, offset)
+
+    return {
+        "total_conflicts": mmsi_total + imo_total + inconsistency_total,
+        "totals": {
+            "mmsi_duplicates": mmsi_total,
+            "imo_duplicates": imo_total,
+            "mmsi_imo_inconsistencies": inconsistency_total
+        },
+        "limit": limit,
+        "offset": offset,
+        "conflicts": {
+            "mmsi_duplicates": mmsi_duplicates,
+            "imo_duplicates": imo_duplicates,
+            "mmsi_imo_inconsistencies": inconsistencies
+        }
+    }
+
+
+def aggregated_key():
+    return case(
+        (and_(models.Vessel.mmsi.isnot(None), models.Vessel.mmsi != ""), models.Vessel.mmsi),
+        else_="imo_" + func.coalesce(models.Vessel.imo, "")
+    )
+
+
+def aggregated_key_filter(keys: Sequence[str]):
+
+    mmsis = [key for key in keys if not key.startswith("imo_")]
+    imos = [key[len("imo_"):] for key in keys if key.startswith("imo_")]
+
+    clauses = []
+    if mmsis:
+        clauses.append(models.Vessel.mmsi.in_(mmsis))
+    if imos:
+        imo_match = models.Vessel.imo.in_(imos)
+        if "" in imos:
+            imo_match = or_(imo_match, models.Vessel.imo.is_(None))
+        clauses.append(and_(or_(models.Vessel.mmsi.is_(None), models.Vessel.mmsi == ""), imo_match))
+    return or_(*clauses)
+
+
+def aggregated_key_page(db: Session, cursor: Optional[str], limit: int) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+
+    key = aggregated_key()
+    list_count = func.count(models.Vessel.id)
+
+    groups = db.query(key, list_count).join(
+        models.VesselList, models.Vessel.list_id == models.VesselList.id
+    ).group_by(key)
+
+    if cursor:
+        last_count, last_key = decode_cursor(cursor, 2)
+        groups = groups.having(or_(
+            list_count < last_count,
+            and_(list_count == last_count, key > last_key)
+        ))
+
+    rows = groups.order_by(list_count.desc(), key).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][1], rows[-1][0]])
+
+    return [tuple(row) for row in rows], next_cursor
@@ -68,6 +68,11 @@ class VesselList(VesselListBase):
 
         from_attributes = True
 
+
+class VesselListPage(BaseModel):
+    items: List[VesselList]
+    next_cursor: Optional[str] = None
+
 class VesselBase(BaseModel):
     mmsi: Optional[str] = Field(None, max_length=20)
     imo: Optional[str] = Field(None, max_length=20)
@@ -133,12 +138,30 @@ class VesselUpdate(BaseModel):
     note: Optional[str] = None
 
 
+class VesselImoUpdate(BaseModel):
+    imo: str = Field(..., min_length=1, max_length=20)
+    fields: VesselUpdate
+
+    @field_validator('imo')
+    @classmethod
+    def strip_imo(cls, v: str) -> str:
+        return v.strip()
+
+
+class VesselImoBulkUpdate(BaseModel):
+    updates: List[VesselImoUpdate] = Field(..., min_length=1, max_length=10000)
+
+
 class Vessel(VesselBase):
     id: int
 
     class Config:
         from_attributes = True
 
+class VesselPage(BaseModel):
+    items: List[Vessel]
+    next_cursor: Optional[str] = None
+
 class VesselBulkCreate(BaseModel):
     mmsi: Optional[str] = Field(None, max_length=20)
     list_ids: List[int] = Field(..., min_length=1, max_length=100)
@@ -0,0 +1,93 @@
+import logging
+from typing import Sequence
+
+from sqlalchemy import Integer, case, column, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+import models
+from config import config
+
+logger = logging.getLogger("search_index")
+
+FTS_TABLE = "vessels_fts"
+FTS_COLUMNS = ("mmsi", "imo", "name")
+MIN_TRIGRAM_LENGTH = 3
+
+_SETUP_STATEMENTS = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        mmsi, imo, name, content='vessels', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON vessels BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, mmsi, imo, name) VALUES (new.id, new.mmsi, new.imo, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON vessels BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, mmsi, imo, name)
+        VALUES ('delete', old.id, old.mmsi, old.imo, old.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF mmsi, imo, name ON vessels BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, mmsi, imo, name)
+        VALUES ('delete', old.id, old.mmsi, old.imo, old.name);
+        INSERT INTO {FTS_TABLE}(rowid, mmsi, imo, name) VALUES (new.id, new.mmsi, new.imo, new.name);
+    END""",
+)
+
+enabled = False
+
+
+def setup(engine: Engine) -> bool:
+    global enabled
+
+    if not config.search.fts_enabled or engine.dialect.name != "sqlite":
+        enabled = False
+        return enabled
+
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            ).first() is not None
+
+            for statement in _SETUP_STATEMENTS:
+                conn.execute(text(statement))
+
+            if not exists:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                logger.info("Vessel search index built")
+    except OperationalError as e:
+        logger.warning(f"FTS5 trigram search unavailable, falling back to LIKE: {e}")
+        enabled = False
+        return enabled
+
+    enabled = True
+    return enabled
+
+
+def _match_expression(columns: Sequence[str], term: str) -> str:
+    phrase = '"' + term.replace('"', '""') + '"'
+    return "{" + " ".join(columns) + "} : " + phrase
+
+
+def contains(columns: Sequence[str], term: str):
+
+    vessel_columns = [getattr(models.Vessel, name) for name in columns]
+
+    # Trigrams cannot match terms shorter than three characters; scan those with LIKE.
+    if not enabled or len(term) < MIN_TRIGRAM_LENGTH:
+        return or_(*[col.contains(term, autoescape=True) for col in vessel_columns])
+
+    matches = text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    ).bindparams(match=_match_expression(columns, term)).columns(column("rowid", Integer))
+    return models.Vessel.id.in_(matches)
+
+
+def relevance(columns: Sequence[str], term: str):
+
+    vessel_columns = [getattr(models.Vessel, name) for name in columns]
+    return case(
+        (or_(*[col == term for col in vessel_columns]), 0),
+        (or_(*[col.startswith(term, autoescape=True) for col in vessel_columns]), 1),
+        else_=2
+    )
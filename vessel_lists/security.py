@@ -1,8 +1,16 @@
 
 import re
+import atexit
+import gzip
 import logging
 import json
+import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional, Any, Dict
 from functools import wraps
 
@@ -11,15 +19,64 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from config import config
 
+class DroppingQueueHandler(QueueHandler):
+    
+
+    def __init__(self, queue_: queue.Queue):
+        super().__init__(queue_)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
 audit_logger = logging.getLogger("audit")
 audit_logger.setLevel(logging.INFO)
 
-_audit_handler = logging.FileHandler("data/audit.log")
-_audit_handler.setFormatter(logging.Formatter(
+_audit_file_handler = RotatingFileHandler(
+    config.audit.path,
+    maxBytes=config.audit.max_bytes,
+    backupCount=config.audit.backup_count,
+    encoding="utf-8",
+)
+_audit_file_handler.setFormatter(logging.Formatter(
     '%(asctime)s | %(levelname)s | %(message)s'
 ))
+if config.audit.compress:
+    _audit_file_handler.namer = _gzip_namer
+    _audit_file_handler.rotator = _gzip_rotator
+
+_audit_handler = DroppingQueueHandler(queue.Queue(config.audit.queue_size))
 audit_logger.addHandler(_audit_handler)
 
+_audit_listener = QueueListener(_audit_handler.queue, _audit_file_handler)
+_audit_listener.start()
+
+
+def stop_audit_logging() -> None:
+    global _audit_listener
+
+    if _audit_listener is not None:
+        _audit_listener.stop()
+        _audit_listener = None
+        _audit_file_handler.close()
+
+
+atexit.register(stop_audit_logging)
+
 
 def sanitize_filename(filename: str, max_length: int = 100) -> str:
     if not filename:
@@ -99,43 +156,74 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class _RateWindow:
+    __slots__ = ("window", "current", "previous", "last_seen")
+
+    def __init__(self, window: int, now: float):
+        self.window = window
+        self.current = 0
+        self.previous = 0
+        self.last_seen = now
+
+
 class RateLimiter:
     
 
-    def __init__(self):
-        self._requests: Dict[str, list] = {}
+    def __init__(self, idle_ttl: Optional[float] = None, cleanup_interval: Optional[float] = None):
+        self._windows: Dict[str, _RateWindow] = {}
+        self._lock = threading.Lock()
+        self.idle_ttl = idle_ttl if idle_ttl is not None else config.rate_limit.idle_ttl_seconds
+        self.cleanup_interval = (
+            cleanup_interval if cleanup_interval is not None
+            else config.rate_limit.cleanup_interval_seconds
+        )
+        self._last_cleanup = time.monotonic()
 
     def is_allowed(self, client_ip: str, max_requests: int = 60, window_seconds: int = 60) -> bool:
         
         if not config.rate_limit.enabled:
             return True
 
-        now = datetime.utcnow()
-        window_start = now.timestamp() - window_seconds
+        now = time.monotonic()
+        window = int(now // window_seconds)
 
-        if client_ip not in self._requests:
-            self._requests[client_ip] = []
+        with self._lock:
+            if now - self._last_cleanup >= self.cleanup_interval:
+                self._evict_idle(now)
 
-        self._requests[client_ip] = [
-            ts for ts in self._requests[client_ip]
-            if ts > window_start
-        ]
+            state = self._windows.get(client_ip)
+            if state is None:
+                state = _RateWindow(window, now)
+                self._windows[client_ip] = state
+            elif state.window != window:
+                state.previous = state.current if state.window == window - 1 else 0
+                state.current = 0
+                state.window = window
 
-        if len(self._requests[client_ip]) >= max_requests:
-            return False
+            state.last_seen = now
 
-        self._requests[client_ip].append(now.timestamp())
-        return True
+            elapsed = (now - window * window_seconds) / window_seconds
+            if state.previous * (1.0 - elapsed) + state.current >= max_requests:
+                return False
+
+            state.current += 1
+            return True
+
+    def _evict_idle(self, now: float) -> int:
+        idle = [ip for ip, state in self._windows.items() if now - state.last_seen > self.idle_ttl]
+        for ip in idle:
+            del self._windows[ip]
+        self._last_cleanup = now
+        return len(idle)
 
     def cleanup(self) -> None:
         
-        now = datetime.utcnow().timestamp()
-        window = 120
+        with self._lock:
+            self._evict_idle(time.monotonic())
 
-        for ip in list(self._requests.keys()):
-            self._requests[ip] = [ts for ts in self._requests[ip] if ts > now - window]
-            if not self._requests[ip]:
-                del self._requests[ip]
+    def get_stats(self) -> Dict:
+        
+        return {"tracked_clients": len(self._windows)}
 
 
 rate_limiter = RateLimiter()
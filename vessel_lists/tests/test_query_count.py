@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/query_count.db")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import database
+import main
+
+client = TestClient(main.app)
+
+SIZES = ((2, 1), (5, 4), (20, 10))
+
+
+def add_lists(count: int, vessels_per_list: int) -> None:
+    for i in range(count):
+        list_id = client.post("/lists/", json={"name": f"List {i}", "color": "#336699"}).json()["id"]
+        for j in range(vessels_per_list):
+            # Every other vessel is shared by all lists so conflicts grow with the data.
+            mmsi = f"{j:09d}" if j % 2 == 0 else f"{list_id:04d}{j:05d}"
+            client.post("/vessels/", json={"mmsi": mmsi, "imo": f"9{j:06d}", "list_id": list_id})
+
+
+def count_statements(url: str) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_list_listing_query_count_is_constant():
+    add_lists(2, 1)
+    small = [count_statements("/lists/"), count_statements("/lists/?paginate=true")]
+
+    add_lists(20, 10)
+    large = [count_statements("/lists/"), count_statements("/lists/?paginate=true")]
+
+    assert small == large
+    assert all(count <= 2 for count in large)
+
+
+def assert_constant_query_count(urls, max_statements: int) -> None:
+    counts = []
+    for lists, vessels_per_list in SIZES:
+        add_lists(lists, vessels_per_list)
+        counts.append([count_statements(url) for url in urls])
+
+    assert all(sizes == counts[0] for sizes in counts), counts
+    assert all(0 < count <= max_statements for count in counts[-1]), counts
+
+
+def test_list_summary_query_count_is_constant():
+    assert_constant_query_count(["/analytics/filters/lists"], 1)
+
+
+def test_conflicts_query_count_is_constant():
+    assert_constant_query_count(["/vessels/conflicts", "/vessels/conflicts?limit=5"], 8)
+
+
+def test_vessel_listing_query_count_is_constant():
+    assert_constant_query_count(["/vessels/all", "/vessels/all?paginate=true&limit=5"], 1)
+
+
+def test_search_query_count_is_constant():
+    assert_constant_query_count(
+        ["/vessels/search?q=0", "/vessels/search?q=0000", "/vessels/search?q=0000&paginate=true&limit=5"], 1
+    )
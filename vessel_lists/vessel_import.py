@@ -0,0 +1,320 @@
+from fastapi import APIRouter, Query, Request
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple
+import codecs
+import csv
+import json
+
+import models, schemas, database
+from ais_websocket import ImoChange, imo_index
+from config import config
+from security import audit_log, validate_mmsi, validate_imo
+
+router = APIRouter()
+
+IMPORT_FIELDS = ('mmsi', 'imo', 'name', 'callsign', 'flag', 'lastposition', 'note', 'list_id')
+
+
+class ImportReport:
+
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+class LineReader:
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._buffer = ""
+        self.line_number = 0
+
+    def feed(self, data: bytes, final: bool = False) -> List[Tuple[int, str]]:
+        self._buffer += self._decoder.decode(data, final)
+        *lines, self._buffer = self._buffer.split("\n")
+
+        if final and self._buffer:
+            lines.append(self._buffer)
+            self._buffer = ""
+
+        numbered = []
+        for line in lines:
+            self.line_number += 1
+            numbered.append((self.line_number, line.rstrip("\r")))
+        return numbered
+
+
+class CsvParser:
+
+    def __init__(self):
+        self.header: Optional[List[str]] = None
+        self._record: List[str] = []
+        self._start = 0
+
+    def feed(self, line_number: int, line: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        if not self._record:
+            self._start = line_number
+        self._record.append(line)
+
+        text = "\n".join(self._record)
+        if text.count('"') % 2:
+            return None
+        self._record = []
+
+        if not text.strip():
+            return None
+
+        values = next(csv.reader([text]))
+        if self.header is None:
+            self.header = [value.strip().lower() for value in values]
+            return None
+        return self._start, dict(zip(self.header, values))
+
+    def close(self) -> Optional[int]:
+        return self._start if self._record else None
+
+
+class NdjsonParser:
+
+    def feed(self, line_number: int, line: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        if not line.strip():
+            return None
+
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError("Expected a JSON object")
+        return line_number, row
+
+    def close(self) -> Optional[int]:
+        return None
+
+
+def parse_row(raw: Dict[str, Any], default_list_id: Optional[int]) -> dict:
+
+    values = {}
+    for field in IMPORT_FIELDS:
+        value = raw.get(field)
+        if value is None:
+            continue
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        value = str(value).strip()
+        if value:
+            values[field] = value
+
+    if not validate_mmsi(values.get('mmsi')):
+        raise ValueError("Invalid MMSI format (must be 9 digits)")
+    if not validate_imo(values.get('imo')):
+        raise ValueError("Invalid IMO format (must be 7 digits)")
+
+    values.setdefault('list_id', default_list_id)
+    if values['list_id'] is None:
+        raise ValueError("list_id is required")
+
+    return schemas.VesselCreate(**values).model_dump()
+
+
+def validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+def _row_keys(row: dict) -> List[tuple]:
+    keys = []
+    if row['mmsi']:
+        keys.append((row['list_id'], 'mmsi', row['mmsi']))
+    if row['imo']:
+        keys.append((row['list_id'], 'imo', row['imo']))
+    return keys
+
+
+def _existing_keys(db: Session, rows: List[dict]) -> Tuple[Dict[tuple, int], Dict[int, Optional[str]]]:
+    list_ids = {row['list_id'] for row in rows}
+    mmsis = {row['mmsi'] for row in rows if row['mmsi']}
+    imos = {row['imo'] for row in rows if row['imo']}
+
+    clauses = []
+    if mmsis:
+        clauses.append(models.Vessel.mmsi.in_(mmsis))
+    if imos:
+        clauses.append(models.Vessel.imo.in_(imos))
+
+    existing: Dict[tuple, int] = {}
+    existing_imos: Dict[int, Optional[str]] = {}
+    matches = db.query(
+        models.Vessel.id, models.Vessel.list_id, models.Vessel.mmsi, models.Vessel.imo
+    ).filter(
+        models.Vessel.list_id.in_(list_ids), or_(*clauses)
+    ).order_by(models.Vessel.id)
+
+    for vessel_id, list_id, mmsi, imo in matches:
+        existing_imos[vessel_id] = imo
+        if mmsi:
+            existing.setdefault((list_id, 'mmsi', mmsi), vessel_id)
+        if imo:
+            existing.setdefault((list_id, 'imo', imo), vessel_id)
+    return existing, existing_imos
+
+
+def import_chunk(
+    db: Session,
+    rows: List[Tuple[int, dict]],
+    upsert: bool,
+    known_lists: Dict[int, bool]
+) -> Tuple[int, int, List[Tuple[int, str]]]:
+
+    unknown = {row['list_id'] for _, row in rows} - known_lists.keys()
+    if unknown:
+        found = {
+            list_id for (list_id,) in
+            db.query(models.VesselList.id).filter(models.VesselList.id.in_(unknown))
+        }
+        known_lists.update({list_id: list_id in found for list_id in unknown})
+
+    errors = []
+    valid = []
+    for line, row in rows:
+        if known_lists[row['list_id']]:
+            valid.append(row)
+        else:
+            errors.append((line, f"List {row['list_id']} not found"))
+
+    inserts: List[dict] = []
+    updates: Dict[int, dict] = {}
+    merged = 0
+
+    existing, existing_imos = _existing_keys(db, valid) if upsert and valid else ({}, {})
+    pending: Dict[tuple, dict] = {}
+
+    for row in valid:
+        if upsert:
+            keys = _row_keys(row)
+            changes = {field: value for field, value in row.items() if value is not None}
+
+            vessel_id = next((existing[key] for key in keys if key in existing), None)
+            if vessel_id is not None:
+                updates.setdefault(vessel_id, {"id": vessel_id}).update(changes)
+                continue
+
+            earlier = next((pending[key] for key in keys if key in pending), None)
+            if earlier is not None:
+                earlier.update(changes)
+                merged += 1
+                continue
+
+            for key in keys:
+                pending[key] = row
+
+        inserts.append(row)
+
+    imo_changes: List[ImoChange] = []
+    if inserts:
+        created = db.execute(
+            insert(models.Vessel).returning(models.Vessel.id, models.Vessel.imo)
+            .execution_options(track_imo_changes=False),
+            inserts
+        )
+        imo_changes.extend((vessel_id, None, imo) for vessel_id, imo in created)
+    if updates:
+        db.execute(
+            update(models.Vessel).execution_options(track_imo_changes=False),
+            list(updates.values())
+        )
+        imo_changes.extend(
+            (vessel_id, existing_imos[vessel_id], values['imo'])
+            for vessel_id, values in updates.items() if 'imo' in values
+        )
+    db.commit()
+
+    imo_index.apply(imo_changes)
+
+    return len(inserts), len(updates) + merged, errors
+
+
+@router.post("/import", tags=["Vessels"])
+async def import_vessels(
+    request: Request,
+    list_id: Optional[int] = Query(None, description="List for rows without a list_id column"),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$", description="Defaults to the Content-Type"),
+    upsert: bool = Query(False, description="Update vessels already in the list, matched by MMSI then IMO"),
+):
+
+    if format is None:
+        format = "ndjson" if "json" in request.headers.get("content-type", "") else "csv"
+
+    parser = NdjsonParser() if format == "ndjson" else CsvParser()
+    reader = LineReader()
+    report = ImportReport(config.imports.max_errors)
+    known_lists: Dict[int, bool] = {}
+    batch: List[Tuple[int, dict]] = []
+
+    async def flush():
+        created, updated, errors = await database.run_db(import_chunk, batch[:], upsert, known_lists)
+        report.created += created
+        report.updated += updated
+        for line, message in errors:
+            report.error(line, message)
+        batch.clear()
+
+    def consume(lines: List[Tuple[int, str]]) -> None:
+        for line_number, line in lines:
+            try:
+                parsed = parser.feed(line_number, line)
+            except ValueError as e:
+                report.rows += 1
+                report.error(line_number, str(e))
+                continue
+
+            if parsed is None:
+                continue
+
+            line_start, raw = parsed
+            report.rows += 1
+            try:
+                batch.append((line_start, parse_row(raw, list_id)))
+            except ValidationError as e:
+                report.error(line_start, validation_message(e))
+            except ValueError as e:
+                report.error(line_start, str(e))
+
+    async for data in request.stream():
+        consume(reader.feed(data))
+        if len(batch) >= config.imports.chunk_size:
+            await flush()
+
+    consume(reader.feed(b"", final=True))
+    unterminated = parser.close()
+    if unterminated is not None:
+        report.rows += 1
+        report.error(unterminated, "Unterminated quoted field")
+
+    if batch:
+        await flush()
+
+    audit_log("IMPORT", "vessels", list_id,
+              {"format": format, "upsert": upsert, "rows": report.rows,
+               "created": report.created, "updated": report.updated, "failed": report.failed}, request)
+
+    return {"format": format, **report.as_dict()}